@@ -0,0 +1,255 @@
+"""
+analytics.py
+Reading Analytics
+-----------------
+Handles:
+- Loading ReadingHistory columns in chunks into compact arrays
+  (NumPy when installed, the array module otherwise)
+- Session counts, completion rate, median session length and total minutes
+- Reading-time-of-day histograms (24 hourly bins)
+- Abandoned-session detection (unfinished and older than ABANDON_AFTER_DAYS)
+- Per-student and per-book breakdowns
+- A single student's statistics from that student's rows only
+- Caching results until the database changes
+
+Timestamps are the wall-clock epoch seconds from StartTs/EndTs, so
+StartTs % 86400 // 3600 is the local hour the session started.
+"""
+
+from array import array
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Optional
+
+from database import SECONDS_PER_DAY, epoch_seconds
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+MISSING = -1  # stands in for NULL in the integer columns
+
+
+# ---------- Column storage ----------
+class HistoryColumns:
+    """ReadingHistory as parallel int64 arrays (NumPy views when available)."""
+
+    __slots__ = ("student", "book", "start", "duration", "completed")
+
+    def __init__(self):
+        self.student = array("q")
+        self.book = array("q")
+        self.start = array("q")
+        self.duration = array("q")
+        self.completed = array("b")
+
+    def __len__(self):
+        return len(self.student)
+
+    def extend(self, rows):
+        for sid, bid, start, duration, completed in rows:
+            self.student.append(sid if sid is not None else MISSING)
+            self.book.append(bid if bid is not None else MISSING)
+            self.start.append(start if start is not None else MISSING)
+            self.duration.append(duration if duration is not None else MISSING)
+            self.completed.append(1 if completed else 0)
+
+    def as_numpy(self):
+        """Zero-copy NumPy views over the arrays."""
+        return {
+            "student": np.frombuffer(self.student, dtype=np.int64),
+            "book": np.frombuffer(self.book, dtype=np.int64),
+            "start": np.frombuffer(self.start, dtype=np.int64),
+            "duration": np.frombuffer(self.duration, dtype=np.int64),
+            "completed": np.frombuffer(self.completed, dtype=np.int8).astype(bool),
+        }
+
+
+# ---------- Analytics ----------
+class ReadingAnalytics:
+    ABANDON_AFTER_DAYS = 14
+    CHUNK_SIZE = 50_000
+
+    def __init__(self, db, use_numpy: Optional[bool] = None):
+        self.db = db
+        self.use_numpy = (np is not None) if use_numpy is None else (use_numpy and np is not None)
+        self._version = None
+        self._cache: Dict[tuple, object] = {}
+
+    # =====================================================
+    # =============== LOADING & CACHING ===================
+    # =====================================================
+    def data_version(self) -> tuple:
+        """Changes whenever this or any other connection commits to the database.
+
+        PRAGMA data_version only moves for other connections' commits, so the
+        connection's own total_changes is included as well.
+        """
+        other = self.db.conn.execute("PRAGMA data_version").fetchone()[0]
+        return other, self.db.conn.total_changes
+
+    def _cached(self, key: tuple, compute):
+        version = self.data_version()
+        if version != self._version:
+            self._cache.clear()
+            self._version = version
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def _load(self, student_id: Optional[int] = None) -> HistoryColumns:
+        cols = HistoryColumns()
+        if student_id is None:
+            cur = self.db.conn.execute(
+                "SELECT StudentID, BookID, StartTs, DurationMinutes, Completed FROM ReadingHistory ORDER BY ReadingID"
+            )
+        else:
+            # Range scan on idx_reading_student_start
+            cur = self.db.conn.execute(
+                "SELECT StudentID, BookID, StartTs, DurationMinutes, Completed FROM ReadingHistory "
+                "WHERE StudentID=? ORDER BY StartTs",
+                (student_id,),
+            )
+        while True:
+            rows = cur.fetchmany(self.CHUNK_SIZE)
+            if not rows:
+                break
+            cols.extend(rows)
+        return cols
+
+    def columns(self, student_id: Optional[int] = None) -> HistoryColumns:
+        """All of ReadingHistory, or only one student's sessions."""
+        return self._cached(("columns", student_id), lambda: self._load(student_id))
+
+    def _abandon_cutoff(self) -> int:
+        return epoch_seconds(datetime.now()) - self.ABANDON_AFTER_DAYS * SECONDS_PER_DAY
+
+    # =====================================================
+    # =============== PUBLIC API ==========================
+    # =====================================================
+    def summary(self, student_id: Optional[int] = None) -> dict:
+        """Overall statistics, or one student's when student_id is given.
+
+        A student's summary only reads that student's rows, so the desk never
+        loads the whole table for the My Stats tab.
+        """
+        return self._cached(("summary", student_id), lambda: self._summary(student_id))
+
+    def per_student(self) -> Dict[int, dict]:
+        return self._cached(("group", "student"), lambda: self._grouped("student"))
+
+    def per_book(self) -> Dict[int, dict]:
+        return self._cached(("group", "book"), lambda: self._grouped("book"))
+
+    # =====================================================
+    # =============== BACKEND DISPATCH ====================
+    # =====================================================
+    def _summary(self, student_id):
+        cols, cutoff = self.columns(student_id), self._abandon_cutoff()
+        if self.use_numpy:
+            return _summary_numpy(cols.as_numpy(), cutoff)
+        return _summary_python(zip(cols.start, cols.duration, cols.completed), cutoff)
+
+    def _grouped(self, by: str) -> Dict[int, dict]:
+        cols, cutoff = self.columns(), self._abandon_cutoff()
+        if self.use_numpy:
+            return _grouped_numpy(cols.as_numpy(), by, cutoff)
+        groups = defaultdict(list)
+        for key, s, d, done in zip(getattr(cols, by), cols.start, cols.duration, cols.completed):
+            groups[key].append((s, d, done))
+        return {key: _summary_python(rows, cutoff, with_hours=False) for key, rows in groups.items()}
+
+
+# =====================================================
+# =============== NUMPY BACKEND =======================
+# =====================================================
+def _summary_numpy(c, cutoff) -> dict:
+    completed = c["completed"]
+    durations = c["duration"][completed & (c["duration"] >= 0)]
+    starts = c["start"][c["start"] >= 0]
+    sessions = int(completed.size)
+    done = int(completed.sum())
+    return {
+        "sessions": sessions,
+        "completed": done,
+        "completion_rate": done / sessions if sessions else 0.0,
+        "median_minutes": float(np.median(durations)) if durations.size else None,
+        "total_minutes": int(durations.sum()),
+        "abandoned": int((~completed & (c["start"] >= 0) & (c["start"] < cutoff)).sum()),
+        "hour_histogram": np.bincount((starts % SECONDS_PER_DAY) // 3600, minlength=24).tolist(),
+    }
+
+
+def _grouped_numpy(c, by: str, cutoff) -> Dict[int, dict]:
+    keys, inverse = np.unique(c[by], return_inverse=True)
+    n = keys.size
+    completed = c["completed"]
+    valid = completed & (c["duration"] >= 0)
+    sessions = np.bincount(inverse, minlength=n)
+    done = np.bincount(inverse, weights=completed, minlength=n)
+    minutes = np.bincount(inverse, weights=np.where(valid, c["duration"], 0), minlength=n)
+    abandoned = np.bincount(inverse, weights=~completed & (c["start"] >= 0) & (c["start"] < cutoff), minlength=n)
+
+    # Group medians in one pass: sort valid durations by (group, duration),
+    # then take the middle element(s) of each group's run.
+    g, d = inverse[valid], c["duration"][valid]
+    order = np.lexsort((d, g))
+    g, d = g[order], d[order]
+    counts = np.bincount(g, minlength=n)
+    first = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    has = counts > 0
+    lo = first + (counts - 1) // 2
+    hi = first + counts // 2
+    medians = np.full(n, np.nan)
+    medians[has] = (d[lo[has]] + d[hi[has]]) / 2.0
+
+    return {
+        int(keys[i]): {
+            "sessions": int(sessions[i]),
+            "completed": int(done[i]),
+            "completion_rate": float(done[i] / sessions[i]),
+            "median_minutes": None if np.isnan(medians[i]) else float(medians[i]),
+            "total_minutes": int(minutes[i]),
+            "abandoned": int(abandoned[i]),
+        }
+        for i in range(n)
+    }
+
+
+# =====================================================
+# =============== PURE-PYTHON BACKEND =================
+# =====================================================
+def _summary_python(rows, cutoff, with_hours: bool = True) -> dict:
+    """rows yields (start, duration, completed) tuples."""
+    sessions = done = abandoned = 0
+    durations = array("q")
+    hours = [0] * 24
+    for start, duration, completed in rows:
+        sessions += 1
+        if completed:
+            done += 1
+            if duration >= 0:
+                durations.append(duration)
+        elif 0 <= start < cutoff:
+            abandoned += 1
+        if start >= 0:
+            hours[start % SECONDS_PER_DAY // 3600] += 1
+
+    median = None
+    if durations:
+        ordered = sorted(durations)
+        mid = len(ordered) // 2
+        median = float(ordered[mid]) if len(ordered) % 2 else (ordered[mid - 1] + ordered[mid]) / 2.0
+
+    result = {
+        "sessions": sessions,
+        "completed": done,
+        "completion_rate": done / sessions if sessions else 0.0,
+        "median_minutes": median,
+        "total_minutes": sum(durations),
+        "abandoned": abandoned,
+    }
+    if with_hours:
+        result["hour_histogram"] = hours
+    return result
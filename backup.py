@@ -0,0 +1,378 @@
+"""
+backup.py
+Online Backup & Snapshot Management
+-----------------------------------
+Handles:
+- Online snapshots of library.db using the sqlite3 backup API
+- Page-batched copying with sleeps so writers are never blocked for long,
+  falling back to a single step when concurrent writes keep restarting it
+- Scheduled runs and rotation of old snapshots
+- Integrity verification (PRAGMA integrity_check) of every snapshot
+- Restoring the live database from a snapshot
+- Per-run timing and page-throughput metrics, including failed runs
+- A check that backups finish while another connection keeps writing
+
+Usage:
+    python backup.py backup                 # take one snapshot now
+    python backup.py schedule --every 3600  # snapshot every hour
+    python backup.py list                   # list snapshots
+    python backup.py restore <snapshot>     # restore library.db from a snapshot
+    python backup.py check                  # back up a scratch DB under concurrent writes
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from database import DEFAULT_DB
+
+BACKUP_DIR = "backups"
+METRICS_FILE = "backup_metrics.jsonl"
+SNAPSHOT_PREFIX = "library-"
+SNAPSHOT_SUFFIX = ".db"
+
+
+class BackupError(Exception):
+    """Raised when a snapshot cannot be taken, verified or restored."""
+
+
+class _CopyRestarting(Exception):
+    """Internal: the batched copy keeps restarting because the source is being written."""
+
+
+# ---------- Backup Manager ----------
+class BackupManager:
+    def __init__(self, db_name: str = DEFAULT_DB, backup_dir: str = BACKUP_DIR,
+                 keep: int = 7, pages_per_step: int = 64, sleep_seconds: float = 0.005,
+                 max_restarts: int = 3, timeout_seconds: float = 300.0):
+        self.db_name = db_name
+        self.backup_dir = backup_dir
+        self.keep = keep
+        self.pages_per_step = pages_per_step
+        self.sleep_seconds = sleep_seconds
+        self.max_restarts = max_restarts
+        self.timeout_seconds = timeout_seconds
+        self.metrics_path = os.path.join(self.backup_dir, METRICS_FILE)
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        os.makedirs(self.backup_dir, exist_ok=True)
+
+    # =====================================================
+    # =============== COPYING =============================
+    # =====================================================
+    def _copy(self, source: sqlite3.Connection, target: sqlite3.Connection) -> dict:
+        """Copy source into target in page batches; return page counters.
+
+        A commit from another connection restarts the copy from page 0, so
+        under steady writes a throttled copy may never finish. After
+        max_restarts restarts the remaining copy runs as one step, holding the
+        source read lock until done. The whole copy is bounded by timeout_seconds.
+        """
+        stats = {"steps": 0, "pages": 0, "restarts": 0, "single_step": False}
+        deadline = time.monotonic() + self.timeout_seconds
+        last_remaining = None
+
+        def progress(status, remaining, total):
+            nonlocal last_remaining
+            stats["steps"] += 1
+            stats["pages"] = total
+            if last_remaining is not None and remaining > last_remaining:
+                stats["restarts"] += 1
+            last_remaining = remaining
+            if time.monotonic() > deadline:
+                raise BackupError(f"Copy did not finish within {self.timeout_seconds}s.")
+            if remaining > 0 and stats["restarts"] >= self.max_restarts:
+                raise _CopyRestarting()
+            # backup(sleep=...) only applies after a BUSY/LOCKED step, so pause
+            # here to give writers a window between every batch.
+            if remaining > 0 and self.sleep_seconds > 0:
+                time.sleep(self.sleep_seconds)
+
+        try:
+            # A negative or zero page count would copy everything in one step and
+            # hold the source read lock for the whole run, so batch by default.
+            source.backup(target, pages=max(1, self.pages_per_step),
+                          progress=progress, sleep=self.sleep_seconds)
+        except _CopyRestarting:
+            stats["single_step"] = True
+            stats["steps"] += 1
+            source.backup(target, pages=-1, sleep=self.sleep_seconds)
+        return stats
+
+    @staticmethod
+    def verify(path: str) -> bool:
+        """Return True if PRAGMA integrity_check reports 'ok' for path."""
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            rows = conn.execute("PRAGMA integrity_check").fetchall()
+        finally:
+            conn.close()
+        return len(rows) == 1 and rows[0][0] == "ok"
+
+    # =====================================================
+    # =============== SNAPSHOTS ===========================
+    # =====================================================
+    def _snapshot_path(self) -> str:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        return os.path.join(self.backup_dir, f"{SNAPSHOT_PREFIX}{stamp}{SNAPSHOT_SUFFIX}")
+
+    def list_snapshots(self) -> List[str]:
+        """Return snapshot paths, oldest first."""
+        names = sorted(
+            n for n in os.listdir(self.backup_dir)
+            if n.startswith(SNAPSHOT_PREFIX) and n.endswith(SNAPSHOT_SUFFIX)
+        )
+        return [os.path.join(self.backup_dir, n) for n in names]
+
+    def rotate(self) -> List[str]:
+        """Delete the oldest snapshots beyond `keep`; return removed paths."""
+        snapshots = self.list_snapshots()
+        removed = snapshots[:-self.keep] if self.keep > 0 else []
+        for path in removed:
+            os.remove(path)
+        return removed
+
+    def backup(self) -> dict:
+        """Take one verified snapshot of the live database and rotate old ones."""
+        if not os.path.exists(self.db_name):
+            raise BackupError(f"Database '{self.db_name}' not found.")
+
+        with self._lock:
+            path = self._snapshot_path()
+            tmp_path = path + ".part"
+            started = time.perf_counter()
+
+            source = sqlite3.connect(self.db_name)
+            target = sqlite3.connect(tmp_path)
+            ok = False
+            try:
+                stats = self._copy(source, target)
+                ok = True
+            except (BackupError, sqlite3.Error) as e:
+                self._record_failure("backup", started, e)
+                raise
+            finally:
+                target.close()
+                source.close()
+                if not ok and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            copied = time.perf_counter()
+
+            if not self.verify(tmp_path):
+                os.remove(tmp_path)
+                error = BackupError("Snapshot failed integrity check; discarded.")
+                self._record_failure("backup", started, error)
+                raise error
+            os.replace(tmp_path, path)
+            finished = time.perf_counter()
+
+            removed = self.rotate()
+            copy_seconds = copied - started
+            metrics = {
+                "action": "backup",
+                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "snapshot": path,
+                "pages": stats["pages"],
+                "steps": stats["steps"],
+                "restarts": stats["restarts"],
+                "single_step": stats["single_step"],
+                "bytes": os.path.getsize(path),
+                "copy_seconds": round(copy_seconds, 6),
+                "verify_seconds": round(finished - copied, 6),
+                "total_seconds": round(finished - started, 6),
+                "pages_per_second": round(stats["pages"] / copy_seconds, 1) if copy_seconds else None,
+                "rotated": removed,
+            }
+            self._record(metrics)
+            return metrics
+
+    def restore(self, snapshot: str) -> dict:
+        """Verify a snapshot, then copy it over the live database online."""
+        if not os.path.exists(snapshot):
+            raise BackupError(f"Snapshot '{snapshot}' not found.")
+        if not self.verify(snapshot):
+            raise BackupError(f"Snapshot '{snapshot}' failed integrity check.")
+
+        with self._lock:
+            started = time.perf_counter()
+            source = sqlite3.connect(f"file:{snapshot}?mode=ro", uri=True)
+            target = sqlite3.connect(self.db_name)
+            try:
+                stats = self._copy(source, target)
+            except (BackupError, sqlite3.Error) as e:
+                self._record_failure("restore", started, e)
+                raise
+            finally:
+                target.close()
+                source.close()
+            elapsed = time.perf_counter() - started
+
+            metrics = {
+                "action": "restore",
+                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "snapshot": snapshot,
+                "pages": stats["pages"],
+                "steps": stats["steps"],
+                "restarts": stats["restarts"],
+                "single_step": stats["single_step"],
+                "total_seconds": round(elapsed, 6),
+                "pages_per_second": round(stats["pages"] / elapsed, 1) if elapsed else None,
+            }
+            self._record(metrics)
+            return metrics
+
+    # =====================================================
+    # =============== SCHEDULING ==========================
+    # =====================================================
+    def start_schedule(self, interval_seconds: float):
+        """Take a snapshot now and then every interval_seconds in the background."""
+        self.stop_schedule()
+        stop = threading.Event()
+
+        def run():
+            while not stop.is_set():
+                try:
+                    self.backup()
+                except (BackupError, sqlite3.Error):
+                    pass  # backup() has recorded the failed run
+                stop.wait(interval_seconds)
+
+        self._stop_event = stop
+        self._thread = threading.Thread(target=run, name="library-backup", daemon=True)
+        self._thread.start()
+
+    def stop_schedule(self):
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+
+    # =====================================================
+    # =============== METRICS =============================
+    # =====================================================
+    def _record_failure(self, action: str, started: float, error: Exception):
+        self._record({
+            "action": action,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "error": str(error),
+            "total_seconds": round(time.perf_counter() - started, 6),
+        })
+
+    def _record(self, metrics: dict):
+        with open(self.metrics_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(metrics) + "\n")
+
+    def load_metrics(self) -> List[dict]:
+        if not os.path.exists(self.metrics_path):
+            return []
+        with open(self.metrics_path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+
+# --------------- CONCURRENCY CHECK ---------------
+def check_concurrent_writes(size_mb: int = 30, write_every: float = 0.1, timeout_seconds: float = 20.0,
+                            directory: str = "backup_check") -> dict:
+    """Back up a scratch database while another connection commits every write_every seconds.
+
+    Raises BackupError if the snapshot does not finish within timeout_seconds.
+    """
+    import shutil
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    path = os.path.join(directory, "scratch.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE Filler (ID INTEGER PRIMARY KEY, Payload BLOB)")
+    conn.executemany("INSERT INTO Filler (Payload) VALUES (?)",
+                     ((os.urandom(1024),) for _ in range(size_mb * 1024)))
+    conn.commit()
+    conn.close()
+
+    stop = threading.Event()
+    commits = 0
+
+    def writer():
+        nonlocal commits
+        w = sqlite3.connect(path, timeout=5)
+        try:
+            while not stop.is_set():
+                w.execute("UPDATE Filler SET Payload=? WHERE ID=?", (os.urandom(1024), commits % 1000 + 1))
+                w.commit()
+                commits += 1
+                stop.wait(write_every)
+        finally:
+            w.close()
+
+    thread = threading.Thread(target=writer, daemon=True)
+    thread.start()
+    try:
+        time.sleep(write_every)
+        manager = BackupManager(path, os.path.join(directory, "snapshots"), timeout_seconds=timeout_seconds)
+        metrics = manager.backup()
+    finally:
+        stop.set()
+        thread.join()
+    metrics["concurrent_commits"] = commits
+    shutil.rmtree(directory, ignore_errors=True)
+    return metrics
+
+
+# --------------- COMMAND LINE ---------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Online backups for the library database.")
+    parser.add_argument("--db", default=DEFAULT_DB, help="database file to back up")
+    parser.add_argument("--dir", default=BACKUP_DIR, help="snapshot directory")
+    parser.add_argument("--keep", type=int, default=7, help="number of snapshots to keep")
+    parser.add_argument("--pages", type=int, default=64, help="pages copied per step")
+    parser.add_argument("--sleep", type=float, default=0.005, help="seconds to sleep between steps")
+    parser.add_argument("--timeout", type=float, default=300.0, help="give up on a copy after this many seconds")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("backup", help="take one snapshot now")
+    schedule = sub.add_parser("schedule", help="take snapshots periodically")
+    schedule.add_argument("--every", type=float, default=3600, help="interval in seconds")
+    sub.add_parser("list", help="list snapshots")
+    restore = sub.add_parser("restore", help="restore the database from a snapshot")
+    restore.add_argument("snapshot")
+    check = sub.add_parser("check", help="back up a scratch database under concurrent writes")
+    check.add_argument("--size-mb", type=int, default=30)
+    check.add_argument("--write-every", type=float, default=0.1, help="seconds between writer commits")
+    args = parser.parse_args(argv)
+
+    if args.command == "check":
+        m = check_concurrent_writes(args.size_mb, args.write_every, timeout_seconds=args.timeout)
+        print(f"✅ Backed up {m['pages']} pages in {m['copy_seconds']}s during {m['concurrent_commits']} "
+              f"concurrent commits ({m['restarts']} restarts, single step: {m['single_step']})")
+        return
+
+    manager = BackupManager(args.db, args.dir, keep=args.keep,
+                            pages_per_step=args.pages, sleep_seconds=args.sleep,
+                            timeout_seconds=args.timeout)
+
+    if args.command == "backup":
+        m = manager.backup()
+        print(f"✅ Snapshot {m['snapshot']} ({m['pages']} pages in {m['copy_seconds']}s, "
+              f"{m['pages_per_second']} pages/s)")
+    elif args.command == "schedule":
+        manager.start_schedule(args.every)
+        print(f"Backing up every {args.every}s. Press Ctrl+C to stop.")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            manager.stop_schedule()
+    elif args.command == "list":
+        for path in manager.list_snapshots():
+            print(path)
+    elif args.command == "restore":
+        m = manager.restore(args.snapshot)
+        print(f"✅ Restored {args.db} from {m['snapshot']} ({m['pages']} pages in {m['total_seconds']}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+catalog_snapshot.py
+Compact In-memory Catalog Snapshot
+----------------------------------
+Handles:
+- Column-wise storage of the Book table for the student browse view
+  (array-backed IDs and codes, interned Author/Category/Status strings)
+- Lazy loading in BookID-ordered chunks
+- In-memory filtering by category, status and author
+- Applying deltas from the CDC ChangeLog instead of reloading
+- Reporting memory use against a list of sqlite3.Row objects
+
+Rows are kept in BookID order, so a BookID is located with bisect on the ID
+array instead of a per-book dict. Deleted books are tombstoned in place.
+
+The snapshot follows the CDC journal without registering as a ChangeConsumer
+(it is in-memory and short-lived). ChangeFeed.prune() keeps the last
+cdc.GRACE_SECONDS of changes for such readers; a snapshot idle for longer
+than that may find its watermark pruned and reload in full.
+
+Usage:
+    python catalog_snapshot.py --books 1000000   # memory comparison
+"""
+
+import sys
+from array import array
+from bisect import bisect_left, insort
+from typing import Iterator, List, Optional, Tuple
+
+DELETED = -1  # status code of a tombstoned row
+
+
+class StringPool:
+    """Interns repeated strings as small integer codes."""
+
+    __slots__ = ("values", "_codes")
+
+    def __init__(self):
+        self.values: List[Optional[str]] = []
+        self._codes = {}
+
+    def code(self, value: Optional[str]) -> int:
+        c = self._codes.get(value)
+        if c is None:
+            c = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return c
+
+    def find(self, value: Optional[str]) -> Optional[int]:
+        return self._codes.get(value)
+
+    def __len__(self):
+        return len(self.values)
+
+
+class CatalogSnapshot:
+    __slots__ = (
+        "db", "chunk_size", "ids", "titles", "authors", "categories", "statuses",
+        "author_codes", "category_codes", "status_codes", "complete", "watermark", "_live",
+    )
+
+    def __init__(self, db, chunk_size: int = 20_000):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.watermark = self._journal_end()
+        self.ids = array("q")
+        self.titles: List[str] = []
+        self.authors = StringPool()
+        self.categories = StringPool()
+        self.statuses = StringPool()
+        self.author_codes = array("l")
+        self.category_codes = array("l")
+        self.status_codes = array("b")
+        self.complete = False
+        self._live = 0
+
+    def __len__(self):
+        """Number of live (non-deleted) books loaded so far."""
+        return self._live
+
+    # =====================================================
+    # =============== LOADING =============================
+    # =====================================================
+    def _journal_end(self) -> int:
+        # The AUTOINCREMENT counter, not MAX(ChangeID): it survives pruning.
+        row = self.db.fetchone("SELECT seq FROM sqlite_sequence WHERE name='ChangeLog'")
+        return row["seq"] if row else 0
+
+    def _append(self, book_id, title, author, category, status):
+        self.ids.append(book_id)
+        self.titles.append(title)
+        self.author_codes.append(self.authors.code(author))
+        self.category_codes.append(self.categories.code(category))
+        self.status_codes.append(self.statuses.code(status))
+        self._live += 1
+
+    def load_next_chunk(self) -> int:
+        """Load the next chunk of books after the last loaded BookID; returns rows loaded."""
+        if self.complete:
+            return 0
+        last = self.ids[-1] if self.ids else 0
+        rows = self.db.conn.execute(
+            "SELECT BookID, Title, Author, Category, AvailabilityStatus FROM Book "
+            "WHERE BookID > ? ORDER BY BookID LIMIT ?",
+            (last, self.chunk_size),
+        ).fetchall()
+        if rows:
+            ids, titles, authors, categories, statuses = zip(*rows)
+            self.ids.extend(ids)
+            self.titles.extend(titles)
+            self.author_codes.extend(map(self.authors.code, authors))
+            self.category_codes.extend(map(self.categories.code, categories))
+            self.status_codes.extend(map(self.statuses.code, statuses))
+            self._live += len(rows)
+        if len(rows) < self.chunk_size:
+            self.complete = True
+        return len(rows)
+
+    def load_all(self):
+        while self.load_next_chunk():
+            pass
+
+    # =====================================================
+    # =============== DELTAS ==============================
+    # =====================================================
+    def refresh(self) -> int:
+        """Apply Book changes logged since the last refresh; returns rows touched.
+
+        If the journal was pruned past our watermark, or the journal end moved
+        backwards (e.g. a restored backup), the snapshot reloads and returns -1.
+        """
+        end = self._journal_end()
+        if end == self.watermark:
+            return 0
+        oldest = self.db.fetchone("SELECT MIN(ChangeID) AS id FROM ChangeLog")["id"]
+        if end < self.watermark or oldest is None or oldest > self.watermark + 1:
+            self._reset()
+            return -1
+
+        changed = self.db.fetchall(
+            "SELECT DISTINCT RowKey FROM ChangeLog WHERE ChangeID > ? AND ChangeID <= ? AND TableName='Book'",
+            (self.watermark, end),
+        )
+        if changed:
+            keys = [r["RowKey"] for r in changed]
+            current = {}
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                for row in self.db.conn.execute(
+                    "SELECT BookID, Title, Author, Category, AvailabilityStatus FROM Book "
+                    f"WHERE BookID IN ({','.join('?' * len(part))})",
+                    part,
+                ):
+                    current[row[0]] = row
+            for key in keys:
+                self._apply(key, current.get(key))
+        self.watermark = end
+        return len(changed)
+
+    def _reset(self):
+        self.__init__(self.db, self.chunk_size)
+
+    def _apply(self, book_id: int, row: Optional[Tuple]):
+        i = bisect_left(self.ids, book_id)
+        found = i < len(self.ids) and self.ids[i] == book_id
+        if row is None:
+            if found and self.status_codes[i] != DELETED:
+                self.status_codes[i] = DELETED
+                self.titles[i] = ""
+                self._live -= 1
+            return
+        _, title, author, category, status = row
+        if found:
+            if self.status_codes[i] == DELETED:
+                self._live += 1
+            self.titles[i] = title
+            self.author_codes[i] = self.authors.code(author)
+            self.category_codes[i] = self.categories.code(category)
+            self.status_codes[i] = self.statuses.code(status)
+        elif not self.complete and (not self.ids or book_id > self.ids[-1]):
+            return  # arrives with a later chunk
+        elif i == len(self.ids):
+            self._append(*row)
+        else:
+            # A BookID below the loaded maximum (rare: explicit IDs); keep order.
+            insort(self.ids, book_id)
+            self.titles.insert(i, title)
+            self.author_codes.insert(i, self.authors.code(author))
+            self.category_codes.insert(i, self.categories.code(category))
+            self.status_codes.insert(i, self.statuses.code(status))
+            self._live += 1
+
+    # =====================================================
+    # =============== QUERIES =============================
+    # =====================================================
+    def row(self, i: int) -> Tuple:
+        return (
+            self.ids[i], self.titles[i], self.authors.values[self.author_codes[i]],
+            self.categories.values[self.category_codes[i]], self.statuses.values[self.status_codes[i]],
+        )
+
+    def filter(self, category: Optional[str] = None, status: Optional[str] = None,
+               author: Optional[str] = None) -> Iterator[Tuple]:
+        """Yield (BookID, Title, Author, Category, Status) rows, loading chunks lazily.
+
+        Chunks where a filter value has not appeared yet are loaded but not
+        scanned; once the snapshot is complete, such a value returns at once.
+        """
+        wanted = []
+        for value, pool, codes in (
+            (category, self.categories, self.category_codes),
+            (status, self.statuses, self.status_codes),
+            (author, self.authors, self.author_codes),
+        ):
+            if value is not None:
+                wanted.append((value, pool, codes))
+        if self.complete and any(pool.find(value) is None for value, pool, _ in wanted):
+            return
+
+        i = 0
+        while True:
+            if i >= len(self.ids):
+                if not self.load_next_chunk():
+                    return
+                continue
+            # Codes are resolved per chunk: a value may first appear in a later chunk.
+            resolved = [(pool.find(value), codes) for value, pool, codes in wanted]
+            end = len(self.ids)
+            if all(code is not None for code, _ in resolved):
+                for j in range(i, end):
+                    if self.status_codes[j] != DELETED and all(codes[j] == code for code, codes in resolved):
+                        yield self.row(j)
+            i = end
+
+    def category_names(self) -> List[str]:
+        return sorted(c for c in self.categories.values if c)
+
+    def status_names(self) -> List[str]:
+        return sorted(s for s in self.statuses.values if s)
+
+    # =====================================================
+    # =============== MEMORY ==============================
+    # =====================================================
+    def memory_usage(self) -> int:
+        """Approximate bytes held by the snapshot's containers and strings."""
+        total = sum(sys.getsizeof(a) for a in (self.ids, self.author_codes, self.category_codes, self.status_codes))
+        total += sys.getsizeof(self.titles) + sum(sys.getsizeof(t) for t in self.titles)
+        for pool in (self.authors, self.categories, self.statuses):
+            total += sys.getsizeof(pool.values) + sys.getsizeof(pool._codes)
+            total += sum(sys.getsizeof(v) for v in pool.values)
+        return total
+
+
+# --------------- BENCHMARK ---------------
+def benchmark(n_books: int = 1_000_000, path: str = "catalog_bench.db"):
+    import os
+    import random
+    import time
+    import tracemalloc
+    from database import Database
+
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(3)
+    db = Database(path)
+    db.conn.execute("DROP TRIGGER IF EXISTS cdc_book_insert")  # skip journaling the bulk load
+    authors = [f"Author {i}" for i in range(20_000)]
+    db.cursor.executemany(
+        "INSERT INTO Book (Title, Author, Category, AvailabilityStatus) VALUES (?, ?, ?, ?)",
+        ((f"Title of book number {i}", rng.choice(authors),
+          rng.choice(("Science", "Arts", "Engineering", "Fiction", "History")),
+          "Available" if rng.random() < 0.8 else "Borrowed") for i in range(n_books)),
+    )
+    db.conn.commit()
+    db.close()
+    db = Database(path)
+
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    rows = db.fetchall("SELECT * FROM Book")
+    row_time = time.perf_counter() - t0
+    row_bytes = tracemalloc.get_traced_memory()[0]
+    del rows
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    snap = CatalogSnapshot(db)
+    snap.load_all()
+    snap_time = time.perf_counter() - t0
+    snap_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    t0 = time.perf_counter()
+    matches = sum(1 for _ in snap.filter(category="Arts", status="Available"))
+    filter_ms = (time.perf_counter() - t0) * 1000
+
+    db.update_book(5, "Changed", "Author 1", "Arts", "Borrowed")
+    t0 = time.perf_counter()
+    touched = snap.refresh()
+    delta_ms = (time.perf_counter() - t0) * 1000
+
+    scale = 1_000_000 / n_books
+    print(f"{n_books:,} books")
+    print(f"list[sqlite3.Row]: {row_bytes / 2**20:8.1f} MiB  ({row_bytes * scale / 2**20:.1f} MiB per 1M)  load {row_time:.2f}s")
+    print(f"CatalogSnapshot  : {snap_bytes / 2**20:8.1f} MiB  ({snap_bytes * scale / 2**20:.1f} MiB per 1M)  load {snap_time:.2f}s"
+          f"  -> {snap_bytes / row_bytes:.0%} of rows")
+    print(f"filter Arts/Available: {matches:,} rows in {filter_ms:.0f} ms;  delta refresh ({touched} row): {delta_ms:.2f} ms")
+    db.close()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare CatalogSnapshot memory with a list of sqlite3.Row.")
+    parser.add_argument("--books", type=int, default=1_000_000)
+    benchmark(parser.parse_args().books)
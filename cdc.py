@@ -0,0 +1,259 @@
+"""
+cdc.py
+Change Data Capture Feed
+------------------------
+Handles:
+- Reading the ChangeLog journal filled by the cdc_* triggers in schema.sql
+- Per-consumer ChangeID watermarks (ChangeConsumer table)
+- Streaming changes after a watermark in batches, exported as JSONL
+- Initial full snapshot for a new consumer
+- Acknowledging and pruning the journal once every consumer has caught up
+- Age/row-count retention when no consumer is registered
+
+Each ChangeLog entry records only (table, key, op). When a batch is read the
+current row is attached, so consumers upsert the latest state; several
+changes to one row inside a batch are coalesced into one record. Reads are
+ChangeID range scans on the journal's primary key, so an incremental sync
+costs time proportional to the number of changes, not to the database size.
+
+CatalogSnapshot (catalog_snapshot.py) also reads the journal, but without
+registering: it lives only as long as a dashboard, and a stale registration
+would block pruning for good. prune() therefore keeps the last GRACE_SECONDS
+of changes, so open snapshots can still apply deltas instead of reloading.
+
+Usage:
+    python cdc.py register warehouse
+    python cdc.py snapshot warehouse --out full.jsonl
+    python cdc.py export warehouse --out changes.jsonl --ack
+    python cdc.py prune --retention-days 7
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime
+from typing import IO, Dict, Iterator, List, Optional
+
+from database import SECONDS_PER_DAY, Database, epoch_seconds
+
+TABLE_KEYS = {
+    "Book": "BookID",
+    "Student": "StudentID",
+    "BorrowedBooks": "BorrowID",
+    "ReadingHistory": "ReadingID",
+    "Users": "UserID",
+}
+# Columns never exported downstream
+EXCLUDED_COLUMNS = {"Users": ("PasswordHash",)}
+DEFAULT_BATCH = 1000
+RETENTION_DAYS = 7           # journal kept when no consumer is registered...
+RETENTION_ROWS = 1_000_000   # ...capped at this many newest entries
+GRACE_SECONDS = 15 * 60      # never pruned, for unregistered readers like CatalogSnapshot
+
+
+class ChangeFeed:
+    def __init__(self, db: Database):
+        self.db = db
+
+    # =====================================================
+    # =============== CONSUMERS ===========================
+    # =====================================================
+    def register(self, consumer: str, from_start: bool = False) -> int:
+        """Create a consumer; new consumers start at the current end of the journal."""
+        start = 0 if from_start else self.last_change_id()
+        self.db.execute(
+            "INSERT OR IGNORE INTO ChangeConsumer (Name, Watermark) VALUES (?, ?)", (consumer, start)
+        )
+        return self.watermark(consumer)
+
+    def unregister(self, consumer: str):
+        self.db.execute("DELETE FROM ChangeConsumer WHERE Name=?", (consumer,))
+
+    def watermark(self, consumer: str) -> int:
+        row = self.db.fetchone("SELECT Watermark FROM ChangeConsumer WHERE Name=?", (consumer,))
+        if not row:
+            raise Exception(f"Unknown CDC consumer '{consumer}'.")
+        return row["Watermark"]
+
+    def ack(self, consumer: str, change_id: int):
+        """Record that consumer has durably applied everything up to change_id."""
+        self.watermark(consumer)  # validates the name
+        self.db.execute(
+            "UPDATE ChangeConsumer SET Watermark = MAX(Watermark, ?) WHERE Name=?", (change_id, consumer)
+        )
+
+    def last_change_id(self) -> int:
+        # The AUTOINCREMENT counter, not MAX(ChangeID): it survives pruning.
+        row = self.db.fetchone("SELECT seq FROM sqlite_sequence WHERE name='ChangeLog'")
+        return row["seq"] if row else 0
+
+    def prune(self, retention_days: float = RETENTION_DAYS, max_rows: int = RETENTION_ROWS,
+              grace_seconds: int = GRACE_SECONDS) -> int:
+        """Delete journal entries that are no longer needed; returns rows removed.
+
+        With consumers registered, entries every consumer has acknowledged go.
+        With none, entries older than retention_days or outside the newest
+        max_rows go. Entries younger than grace_seconds are always kept.
+        """
+        now = epoch_seconds(datetime.now())
+        low = self.db.fetchone("SELECT MIN(Watermark) AS low FROM ChangeConsumer")["low"]
+        if low is not None:
+            condition, params = "ChangeID <= ?", (low,)
+        else:
+            condition = "(ChangeID <= ? OR ChangedAt < ?)"
+            params = (self.last_change_id() - max_rows, now - int(retention_days * SECONDS_PER_DAY))
+        self.db.execute(
+            f"DELETE FROM ChangeLog WHERE {condition} AND ChangedAt < ?", (*params, now - grace_seconds)
+        )
+        return self.db.cursor.rowcount
+
+    # =====================================================
+    # =============== STREAMING ===========================
+    # =====================================================
+    def _rows(self, table: str, keys: List[int]) -> Dict[int, dict]:
+        key_col = TABLE_KEYS[table]
+        excluded = EXCLUDED_COLUMNS.get(table, ())
+        placeholders = ",".join("?" * len(keys))
+        rows = self.db.fetchall(f"SELECT * FROM {table} WHERE {key_col} IN ({placeholders})", tuple(keys))
+        return {
+            r[key_col]: {k: r[k] for k in r.keys() if k not in excluded}
+            for r in rows
+        }
+
+    def batches(self, after: int, batch_size: int = DEFAULT_BATCH) -> Iterator[List[dict]]:
+        """Yield lists of change records with ChangeID > after, oldest first."""
+        while True:
+            entries = self.db.fetchall(
+                "SELECT ChangeID, TableName, RowKey, Op, ChangedAt FROM ChangeLog "
+                "WHERE ChangeID > ? ORDER BY ChangeID LIMIT ?",
+                (after, batch_size),
+            )
+            if not entries:
+                return
+
+            # Keep only the newest entry per row; its op and the current row win.
+            latest = {}
+            for e in entries:
+                latest[(e["TableName"], e["RowKey"])] = e
+            by_table: Dict[str, List[int]] = {}
+            for table, key in latest:
+                if table in TABLE_KEYS:
+                    by_table.setdefault(table, []).append(key)
+            current = {table: self._rows(table, keys) for table, keys in by_table.items()}
+
+            batch = []
+            for (table, key), e in sorted(latest.items(), key=lambda kv: kv[1]["ChangeID"]):
+                row = current.get(table, {}).get(key)
+                batch.append({
+                    "change_id": e["ChangeID"],
+                    "table": table,
+                    "op": "D" if row is None else e["Op"],
+                    "key": key,
+                    "changed_at": e["ChangedAt"],
+                    "row": row,
+                })
+            after = entries[-1]["ChangeID"]
+            yield batch
+
+    def export_jsonl(self, consumer: str, out: IO[str], batch_size: int = DEFAULT_BATCH,
+                     ack: bool = False) -> dict:
+        """Write changes after consumer's watermark to out, one JSON object per line.
+
+        With ack=True the watermark advances after each batch is flushed;
+        otherwise call ack() once the output has been applied downstream.
+        """
+        start = self.watermark(consumer)
+        last, count = start, 0
+        for batch in self.batches(start, batch_size):
+            for record in batch:
+                out.write(json.dumps(record, default=str) + "\n")
+            out.flush()
+            count += len(batch)
+            last = batch[-1]["change_id"]
+            if ack:
+                self.ack(consumer, last)
+        return {"consumer": consumer, "from": start, "to": last, "records": count}
+
+    def snapshot_jsonl(self, consumer: str, out: IO[str], batch_size: int = DEFAULT_BATCH) -> dict:
+        """Full export (op 'S') for bootstrapping, then move consumer to the journal end.
+
+        The journal position is read first, so changes made during the snapshot
+        are delivered again by the next export; upserts make that harmless.
+        """
+        self.register(consumer)
+        position = self.last_change_id()
+        count = 0
+        for table, key_col in TABLE_KEYS.items():
+            excluded = EXCLUDED_COLUMNS.get(table, ())
+            last_key = None
+            while True:
+                if last_key is None:
+                    rows = self.db.fetchall(f"SELECT * FROM {table} ORDER BY {key_col} LIMIT ?", (batch_size,))
+                else:
+                    rows = self.db.fetchall(
+                        f"SELECT * FROM {table} WHERE {key_col} > ? ORDER BY {key_col} LIMIT ?",
+                        (last_key, batch_size),
+                    )
+                if not rows:
+                    break
+                for r in rows:
+                    out.write(json.dumps({
+                        "change_id": position, "table": table, "op": "S", "key": r[key_col],
+                        "changed_at": None, "row": {k: r[k] for k in r.keys() if k not in excluded},
+                    }, default=str) + "\n")
+                count += len(rows)
+                last_key = rows[-1][key_col]
+        out.flush()
+        self.db.execute("UPDATE ChangeConsumer SET Watermark=? WHERE Name=?", (position, consumer))
+        return {"consumer": consumer, "to": position, "records": count}
+
+
+# --------------- COMMAND LINE ---------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incremental change feed for the library database.")
+    parser.add_argument("--db", default="library.db")
+    sub = parser.add_subparsers(dest="command", required=True)
+    reg = sub.add_parser("register", help="create a consumer at the current journal end")
+    reg.add_argument("consumer")
+    reg.add_argument("--from-start", action="store_true", help="start at the oldest retained change")
+    for name, help_text in (("export", "write changes since the watermark"), ("snapshot", "write a full snapshot")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("consumer")
+        p.add_argument("--out", help="output file (default: stdout)")
+        p.add_argument("--batch", type=int, default=DEFAULT_BATCH)
+        if name == "export":
+            p.add_argument("--ack", action="store_true", help="advance the watermark after writing")
+    ack = sub.add_parser("ack", help="acknowledge changes up to a ChangeID")
+    ack.add_argument("consumer")
+    ack.add_argument("change_id", type=int)
+    prune = sub.add_parser("prune", help="delete acknowledged changes, or old ones when no consumer exists")
+    prune.add_argument("--retention-days", type=float, default=RETENTION_DAYS)
+    prune.add_argument("--max-rows", type=int, default=RETENTION_ROWS)
+    args = parser.parse_args(argv)
+
+    db = Database(args.db)
+    feed = ChangeFeed(db)
+    try:
+        if args.command == "register":
+            print(f"Consumer '{args.consumer}' at ChangeID {feed.register(args.consumer, args.from_start)}")
+        elif args.command in ("export", "snapshot"):
+            out: Optional[IO[str]] = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+            try:
+                if args.command == "export":
+                    result = feed.export_jsonl(args.consumer, out, args.batch, ack=args.ack)
+                else:
+                    result = feed.snapshot_jsonl(args.consumer, out, args.batch)
+            finally:
+                if args.out:
+                    out.close()
+            print(result, file=sys.stderr)
+        elif args.command == "ack":
+            feed.ack(args.consumer, args.change_id)
+        elif args.command == "prune":
+            print(f"Pruned {feed.prune(args.retention_days, args.max_rows)} change(s).")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -12,11 +12,17 @@ Handles:
 import sqlite3
 import hashlib
 import os
-from datetime import datetime, timedelta
+import calendar
+from datetime import date, datetime, timedelta
 from typing import List, Tuple, Optional
 
+from search_index import BookSearchIndex
+
 DEFAULT_DB = "library.db"
 SCHEMA_FILE = "schema.sql"
+SECONDS_PER_DAY = 86400
+DATE_COLUMNS_VERSION = 1  # PRAGMA user_version once the integer date columns are migrated
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
 
 
 # ---------- Helper ----------
@@ -25,6 +31,81 @@ def hash_password(password: str) -> str:
     return hashlib.sha256(password.encode("utf-8")).hexdigest()
 
 
+def epoch_day(d: date) -> int:
+    """Return the number of days between 1970-01-01 and d."""
+    return d.toordinal() - _EPOCH_ORDINAL
+
+
+def epoch_seconds(dt: datetime) -> int:
+    """Return wall-clock seconds since 1970-01-01 00:00 for a naive local datetime.
+
+    Matches SQLite's strftime('%s', text) on the stored text columns, so
+    epoch_seconds(dt) // SECONDS_PER_DAY == epoch_day(dt.date()).
+    """
+    return calendar.timegm(dt.timetuple())
+
+
+# ---------- Loan hand-off ----------
+# Cursor-level steps shared by Database and federation.py, which runs them on
+# its pooled branch connections. None of them commit.
+def next_hold(cursor: sqlite3.Cursor, book_id: int):
+    """First unexpired active hold for a book, in queue order."""
+    cursor.execute(
+        "SELECT HoldID, StudentID FROM Hold WHERE BookID=? AND Status='Active' "
+        "AND (ExpiresAt IS NULL OR ExpiresAt >= ?) "
+        "ORDER BY Priority DESC, CreatedAt, HoldID LIMIT 1",
+        (book_id, epoch_seconds(datetime.now())),
+    )
+    return cursor.fetchone()
+
+
+def open_loan(cursor: sqlite3.Cursor, student_id: int, book_id: int,
+              librarian_id: Optional[int], days_due: int = 7) -> int:
+    """Insert a loan, mark the book Borrowed and reward the student."""
+    today = date.today()
+    due = today + timedelta(days=days_due)
+    cursor.execute(
+        "INSERT INTO BorrowedBooks (StudentID, BookID, LibrarianID, BorrowDate, DueDate, BorrowDay, DueDay, Status) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, 'Borrowed')",
+        (student_id, book_id, librarian_id, today.isoformat(), due.isoformat(), epoch_day(today), epoch_day(due)),
+    )
+    borrow_id = cursor.lastrowid
+    cursor.execute("UPDATE Book SET AvailabilityStatus='Borrowed' WHERE BookID=?", (book_id,))
+    cursor.execute("UPDATE Student SET Score = Score + 5 WHERE StudentID=?", (student_id,))
+    return borrow_id
+
+
+def open_reading(cursor: sqlite3.Cursor, student_id: int, book_id: int) -> int:
+    """Insert a reading session and reward the student for starting."""
+    start_time = datetime.now().replace(microsecond=0)
+    cursor.execute(
+        "INSERT INTO ReadingHistory (StudentID, BookID, StartDate, StartTs) VALUES (?, ?, ?, ?)",
+        (student_id, book_id, start_time.strftime("%Y-%m-%d %H:%M:%S"), epoch_seconds(start_time)),
+    )
+    reading_id = cursor.lastrowid
+    cursor.execute("UPDATE Student SET Score = Score + 2 WHERE StudentID=?", (student_id,))  # reward for starting
+    return reading_id
+
+
+def release_book(cursor: sqlite3.Cursor, book_id: int, librarian_id: Optional[int] = None) -> Optional[int]:
+    """Lend a book that came back to its next holder, or mark it Available.
+
+    Returns the holder's StudentID, or None if nobody was waiting.
+    """
+    hold = next_hold(cursor, book_id)
+    if hold:
+        new_borrow_id = open_loan(cursor, hold["StudentID"], book_id, librarian_id)
+        # The holder returns it like any borrowed book, by finishing reading
+        open_reading(cursor, hold["StudentID"], book_id)
+        cursor.execute(
+            "UPDATE Hold SET Status='Fulfilled', BorrowID=? WHERE HoldID=?",
+            (new_borrow_id, hold["HoldID"]),
+        )
+        return hold["StudentID"]
+    cursor.execute("UPDATE Book SET AvailabilityStatus='Available' WHERE BookID=?", (book_id,))
+    return None
+
+
 # ---------- Database Class ----------
 class Database:
     def __init__(self, db_name: str = DEFAULT_DB, schema_file: str = SCHEMA_FILE):
@@ -33,6 +114,7 @@ class Database:
         self.conn: sqlite3.Connection = sqlite3.connect(self.db_name)
         self.conn.row_factory = sqlite3.Row
         self.cursor = self.conn.cursor()
+        self.search_index: Optional[BookSearchIndex] = None
         self.initialize_db()
 
     # =====================================================
@@ -52,6 +134,7 @@ class Database:
             self._create_default_admin()
 
         self.ensure_isactive_column()
+        self.ensure_date_columns()
 
     def _users_count(self) -> int:
         self.cursor.execute("SELECT COUNT(*) as cnt FROM Users")
@@ -96,6 +179,59 @@ class Database:
         except sqlite3.OperationalError:
             pass  # column already exists
 
+    def ensure_date_columns(self):
+        """Add integer date columns to older databases, backfill them and index them.
+
+        Runs as one transaction that also sets PRAGMA user_version, so it is
+        skipped on later starts and an interrupted run is redone in full.
+        """
+        if self._schema_version() >= DATE_COLUMNS_VERSION:
+            return
+        self.cursor.execute("BEGIN IMMEDIATE")
+        try:
+            if self._schema_version() >= DATE_COLUMNS_VERSION:
+                self.conn.rollback()
+                return  # another connection migrated meanwhile
+            for table, column in (
+                ("BorrowedBooks", "BorrowDay"),
+                ("BorrowedBooks", "DueDay"),
+                ("BorrowedBooks", "ReturnDay"),
+                ("ReadingHistory", "StartTs"),
+                ("ReadingHistory", "EndTs"),
+            ):
+                try:
+                    self.cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER")
+                except sqlite3.OperationalError:
+                    pass  # column already exists
+
+            # julianday() of 1970-01-01 is 2440587.5; text dates are local wall clock
+            for statement in (
+                "UPDATE BorrowedBooks SET BorrowDay = CAST(julianday(BorrowDate) - 2440587.5 AS INTEGER) "
+                "WHERE BorrowDay IS NULL AND BorrowDate IS NOT NULL",
+                "UPDATE BorrowedBooks SET DueDay = CAST(julianday(DueDate) - 2440587.5 AS INTEGER) "
+                "WHERE DueDay IS NULL AND DueDate IS NOT NULL",
+                "UPDATE BorrowedBooks SET ReturnDay = CAST(julianday(ReturnDate) - 2440587.5 AS INTEGER) "
+                "WHERE ReturnDay IS NULL AND ReturnDate IS NOT NULL",
+                "UPDATE ReadingHistory SET StartTs = CAST(strftime('%s', StartDate) AS INTEGER) "
+                "WHERE StartTs IS NULL AND StartDate IS NOT NULL",
+                "UPDATE ReadingHistory SET EndTs = CAST(strftime('%s', EndDate) AS INTEGER) "
+                "WHERE EndTs IS NULL AND EndDate IS NOT NULL",
+                "CREATE INDEX IF NOT EXISTS idx_borrowed_status_due ON BorrowedBooks (Status, DueDay, StudentID, BookID)",
+                "CREATE INDEX IF NOT EXISTS idx_borrowed_student_day ON BorrowedBooks (StudentID, BorrowDay)",
+                "CREATE INDEX IF NOT EXISTS idx_borrowed_day ON BorrowedBooks (BorrowDay)",
+                "CREATE INDEX IF NOT EXISTS idx_reading_student_start ON ReadingHistory (StudentID, StartTs)",
+                "CREATE INDEX IF NOT EXISTS idx_reading_student_completed_end "
+                "ON ReadingHistory (StudentID, Completed, EndTs)",
+                f"PRAGMA user_version = {DATE_COLUMNS_VERSION}",
+            ):
+                self.cursor.execute(statement)
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+
+    def _schema_version(self) -> int:
+        return self.cursor.execute("PRAGMA user_version").fetchone()[0]
 
     # =====================================================
     # =============== AUTHENTICATION ======================
@@ -152,16 +288,23 @@ class Database:
             "INSERT INTO Book (Title, Author, Category, LocationID) VALUES (?, ?, ?, ?)",
             (title, author, category, location_id),
         )
-        return self.cursor.lastrowid
+        book_id = self.cursor.lastrowid
+        if self.search_index is not None:
+            self.search_index.add(book_id, title, author)
+        return book_id
 
     def update_book(self, book_id, title, author, category, status):
         self.execute(
             "UPDATE Book SET Title=?, Author=?, Category=?, AvailabilityStatus=? WHERE BookID=?",
             (title, author, category, status, book_id),
         )
+        if self.search_index is not None:
+            self.search_index.update(book_id, title, author)
 
     def delete_book(self, book_id):
         self.execute("DELETE FROM Book WHERE BookID=?", (book_id,))
+        if self.search_index is not None:
+            self.search_index.remove(book_id)
 
     def search_books(self, keyword):
         key = f"%{keyword}%"
@@ -170,74 +313,222 @@ class Database:
             (key, key, key),
         )
 
+    def attach_search_index(self, build: bool = True) -> BookSearchIndex:
+        """Attach the in-memory title/author index; book CRUD keeps it in sync from now on.
+
+        With build=False the index starts empty; fill it with build_search_index(),
+        which may run on a worker thread.
+        """
+        self.search_index = BookSearchIndex()
+        if build:
+            self.build_search_index()
+        return self.search_index
+
+    def build_search_index(self):
+        """Load every book into search_index through a separate connection."""
+        conn = sqlite3.connect(self.db_name)
+        try:
+            self.search_index.build(conn.execute("SELECT BookID, Title, Author FROM Book"))
+        finally:
+            conn.close()
+
+    def get_books_by_ids(self, book_ids: List[int]) -> List[sqlite3.Row]:
+        """Book rows for the given IDs, in the same order."""
+        if not book_ids:
+            return []
+        placeholders = ",".join("?" * len(book_ids))
+        rows = self.fetchall(f"SELECT * FROM Book WHERE BookID IN ({placeholders})", tuple(book_ids))
+        by_id = {r["BookID"]: r for r in rows}
+        return [by_id[b] for b in book_ids if b in by_id]
+
     # =====================================================
     # =============== BORROWING SYSTEM ====================
     # =====================================================
     def borrow_book(self, student_id: int, book_id: int, librarian_id: int, days_due: int = 7):
         """Student borrows a book; auto-updates availability and score."""
-        borrow_date = datetime.now().strftime("%Y-%m-%d")
-        due_date = (datetime.now() + timedelta(days=days_due)).strftime("%Y-%m-%d")
-
         # Check availability
         book = self.fetchone("SELECT AvailabilityStatus FROM Book WHERE BookID=?", (book_id,))
         if not book or book["AvailabilityStatus"] != "Available":
             raise Exception("Book not available for borrowing.")
 
-        # Insert record
-        self.execute(
-            "INSERT INTO BorrowedBooks (StudentID, BookID, LibrarianID, BorrowDate, DueDate, Status) VALUES (?, ?, ?, ?, ?, 'Borrowed')",
-            (student_id, book_id, librarian_id, borrow_date, due_date),
-        )
-        # Update book status
-        self.execute("UPDATE Book SET AvailabilityStatus='Borrowed' WHERE BookID=?", (book_id,))
-        # Reward points
-        self.update_student_score(student_id, +5)
+        with self.conn:
+            # Claim the copy in the transaction: a concurrent borrower may have
+            # taken it since the check above.
+            self.cursor.execute(
+                "UPDATE Book SET AvailabilityStatus='Borrowed' WHERE BookID=? AND AvailabilityStatus='Available'",
+                (book_id,),
+            )
+            if self.cursor.rowcount != 1:
+                raise Exception("Book not available for borrowing.")
+            self._open_loan(student_id, book_id, librarian_id, days_due)
 
-    def return_book(self, borrow_id: int):
-        """Mark book as returned and adjust score based on timeliness."""
+    def _open_loan(self, student_id: int, book_id: int, librarian_id: int, days_due: int = 7) -> int:
+        """Insert a loan, mark the book Borrowed and reward the student (no commit)."""
+        return open_loan(self.cursor, student_id, book_id, librarian_id, days_due)
+
+    def return_book(self, borrow_id: int) -> Optional[int]:
+        """Mark book as returned and adjust score based on timeliness.
+
+        If the book has active holds, it is lent straight to the first holder in
+        the same transaction (see release_book); that holder's StudentID is returned.
+        """
         record = self.fetchone("SELECT * FROM BorrowedBooks WHERE BorrowID=?", (borrow_id,))
         if not record:
             raise Exception("Invalid borrow record.")
 
-        return_date = datetime.now().strftime("%Y-%m-%d")
-        due_date = datetime.strptime(record["DueDate"], "%Y-%m-%d").date()
-        is_late = datetime.now().date() > due_date
+        today = date.today()
+        is_late = record["DueDay"] is not None and epoch_day(today) > record["DueDay"]
 
-        # Update BorrowedBooks record
-        self.execute("UPDATE BorrowedBooks SET ReturnDate=?, Status='Returned' WHERE BorrowID=?", (return_date, borrow_id))
-        # Make book available again
-        self.execute("UPDATE Book SET AvailabilityStatus='Available' WHERE BookID=?", (record["BookID"],))
-        # Adjust score
-        if is_late:
-            self.update_student_score(record["StudentID"], -10)
-        else:
-            self.update_student_score(record["StudentID"], +10)
+        with self.conn:
+            # Close the loan only if it is still open, so two concurrent
+            # returns cannot both score and hand the book on.
+            self.cursor.execute(
+                "UPDATE BorrowedBooks SET ReturnDate=?, ReturnDay=?, Status='Returned' "
+                "WHERE BorrowID=? AND Status='Borrowed'",
+                (today.isoformat(), epoch_day(today), borrow_id),
+            )
+            if self.cursor.rowcount != 1:
+                raise Exception("Book already returned.")
+            # Adjust score
+            self.cursor.execute(
+                "UPDATE Student SET Score = Score + ? WHERE StudentID=?",
+                (-10 if is_late else +10, record["StudentID"]),
+            )
+            return self.release_book(record["BookID"], record["LibrarianID"])
+
+    def release_book(self, book_id: int, librarian_id: Optional[int] = None) -> Optional[int]:
+        """Lend a book that came back to its next holder, or mark it Available (no commit).
+
+        Returns the holder's StudentID, or None if nobody was waiting.
+        """
+        return release_book(self.cursor, book_id, librarian_id)
+
+    # =====================================================
+    # =============== HOLDS QUEUE =========================
+    # =====================================================
+    # Queue order is Priority DESC, CreatedAt, HoldID. Priority is fixed when the
+    # hold is placed: Score * HOLD_SCORE_WEIGHT + numeric Level * HOLD_LEVEL_WEIGHT.
+    # With both weights at 0 the queue is plain first-come, first-served.
+    HOLD_SCORE_WEIGHT = 0
+    HOLD_LEVEL_WEIGHT = 0
+    HOLD_EXPIRY_DAYS = 30
+
+    def _hold_priority(self, student_id: int) -> int:
+        row = self.fetchone(
+            "SELECT CAST(Score * ? + CAST(Level AS INTEGER) * ? AS INTEGER) AS Priority FROM Student WHERE StudentID=?",
+            (self.HOLD_SCORE_WEIGHT, self.HOLD_LEVEL_WEIGHT, student_id),
+        )
+        if not row:
+            raise Exception("Invalid student.")
+        return row["Priority"] or 0
+
+    def place_hold(self, student_id: int, book_id: int) -> int:
+        """Queue a student for a borrowed book; returns the new HoldID."""
+        book = self.fetchone("SELECT AvailabilityStatus FROM Book WHERE BookID=?", (book_id,))
+        if not book:
+            raise Exception("Invalid book.")
+        if book["AvailabilityStatus"] == "Available":
+            raise Exception("Book is available; borrow it instead.")
+        if self.fetchone(
+            "SELECT 1 FROM BorrowedBooks WHERE StudentID=? AND BookID=? AND Status='Borrowed'",
+            (student_id, book_id),
+        ):
+            raise Exception("You are already borrowing this book.")
+        if self.fetchone(
+            "SELECT 1 FROM Hold WHERE StudentID=? AND BookID=? AND Status='Active'",
+            (student_id, book_id),
+        ):
+            raise Exception("You already have a hold on this book.")
+
+        now = epoch_seconds(datetime.now())
+        expires = now + self.HOLD_EXPIRY_DAYS * SECONDS_PER_DAY if self.HOLD_EXPIRY_DAYS else None
+        with self.conn:
+            # Re-check availability in the INSERT itself: a return landing after
+            # the check above would otherwise leave a hold nobody serves.
+            self.cursor.execute(
+                "INSERT INTO Hold (StudentID, BookID, Priority, CreatedAt, ExpiresAt, Status) "
+                "SELECT ?, ?, ?, ?, ?, 'Active' WHERE EXISTS "
+                "(SELECT 1 FROM Book WHERE BookID=? AND AvailabilityStatus <> 'Available')",
+                (student_id, book_id, self._hold_priority(student_id), now, expires, book_id),
+            )
+            if self.cursor.rowcount != 1:
+                raise Exception("Book is available; borrow it instead.")
+        return self.cursor.lastrowid
+
+    def cancel_hold(self, hold_id: int):
+        self.execute("UPDATE Hold SET Status='Cancelled' WHERE HoldID=? AND Status='Active'", (hold_id,))
+
+    def _next_hold(self, book_id: int):
+        """First unexpired active hold for a book, in queue order."""
+        return next_hold(self.cursor, book_id)
+
+    def get_hold_position(self, hold_id: int) -> Optional[int]:
+        """1-based queue position of an active hold, or None if it is no longer active.
+
+        Expired holds that the sweep has not reached yet are skipped, as in
+        _next_hold. Both counts are range scans on idx_hold_queue, so the cost is
+        bounded by the index seek plus the holds ahead, never by the size of the table.
+        """
+        now = epoch_seconds(datetime.now())
+        hold = self.fetchone(
+            "SELECT BookID, Priority, CreatedAt FROM Hold WHERE HoldID=? AND Status='Active' "
+            "AND (ExpiresAt IS NULL OR ExpiresAt >= ?)",
+            (hold_id, now),
+        )
+        if not hold:
+            return None
+        higher = self.fetchone(
+            "SELECT COUNT(*) AS cnt FROM Hold WHERE BookID=? AND Status='Active' AND Priority > ? "
+            "AND (ExpiresAt IS NULL OR ExpiresAt >= ?)",
+            (hold["BookID"], hold["Priority"], now),
+        )["cnt"]
+        earlier = self.fetchone(
+            "SELECT COUNT(*) AS cnt FROM Hold WHERE BookID=? AND Status='Active' AND Priority = ? "
+            "AND (CreatedAt, HoldID) < (?, ?) AND (ExpiresAt IS NULL OR ExpiresAt >= ?)",
+            (hold["BookID"], hold["Priority"], hold["CreatedAt"], hold_id, now),
+        )["cnt"]
+        return higher + earlier + 1
+
+    def get_student_holds(self, student_id: int):
+        return self.fetchall(
+            "SELECT h.*, b.Title FROM Hold h JOIN Book b ON h.BookID=b.BookID "
+            "WHERE h.StudentID=? ORDER BY h.CreatedAt DESC",
+            (student_id,),
+        )
+
+    def expire_holds(self, now: Optional[datetime] = None) -> int:
+        """Batch sweep: mark active holds past their expiry as Expired; returns the count."""
+        self.execute(
+            "UPDATE Hold SET Status='Expired' WHERE Status='Active' AND ExpiresAt < ?",
+            (epoch_seconds(now or datetime.now()),),
+        )
+        return self.cursor.rowcount
 
     # =====================================================
     # =============== READING HISTORY =====================
     # =====================================================
+    def _open_reading(self, student_id: int, book_id: int) -> int:
+        """Insert a reading session and reward the student for starting (no commit)."""
+        return open_reading(self.cursor, student_id, book_id)
+
     def start_reading(self, student_id: int, book_id: int):
         """Log the start of a reading session."""
-        start_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.execute(
-            "INSERT INTO ReadingHistory (StudentID, BookID, StartDate) VALUES (?, ?, ?)",
-            (student_id, book_id, start_date),
-        )
-        self.update_student_score(student_id, +2)  # reward for starting
+        with self.conn:
+            self._open_reading(student_id, book_id)
 
     def finish_reading(self, reading_id: int):
         """Mark a reading session complete and award points."""
-        end_time = datetime.now()
+        end_time = datetime.now().replace(microsecond=0)
         session = self.fetchone("SELECT * FROM ReadingHistory WHERE ReadingID=?", (reading_id,))
         if not session or session["EndDate"]:
             return
 
-        start_time = datetime.strptime(session["StartDate"], "%Y-%m-%d %H:%M:%S")
-        duration = int((end_time - start_time).total_seconds() // 60)
+        end_ts = epoch_seconds(end_time)
+        duration = (end_ts - session["StartTs"]) // 60 if session["StartTs"] is not None else None
 
         self.execute(
-            "UPDATE ReadingHistory SET EndDate=?, DurationMinutes=?, Completed=1 WHERE ReadingID=?",
-            (end_time.strftime("%Y-%m-%d %H:%M:%S"), duration, reading_id),
+            "UPDATE ReadingHistory SET EndDate=?, EndTs=?, DurationMinutes=?, Completed=1 WHERE ReadingID=?",
+            (end_time.strftime("%Y-%m-%d %H:%M:%S"), end_ts, duration, reading_id),
         )
 
         self.update_student_score(session["StudentID"], +10)
@@ -246,29 +537,55 @@ class Database:
     def _update_reading_streak(self, student_id: int):
         """Check last reading date and update streak."""
         last_read = self.fetchone(
-            "SELECT EndDate FROM ReadingHistory WHERE StudentID=? AND Completed=1 ORDER BY EndDate DESC LIMIT 1",
+            "SELECT MAX(EndTs) AS LastEnd FROM ReadingHistory WHERE StudentID=? AND Completed=1",
             (student_id,),
         )
-        if not last_read or not last_read["EndDate"]:
+        if not last_read or last_read["LastEnd"] is None:
             self.reset_streak(student_id)
             return
 
-        last_date = datetime.strptime(last_read["EndDate"].split(" ")[0], "%Y-%m-%d").date()
-        today = datetime.now().date()
+        days_since = epoch_day(date.today()) - last_read["LastEnd"] // SECONDS_PER_DAY
 
-        if (today - last_date).days == 1:
+        if days_since == 1:
             self.increment_streak(student_id)
             self.update_student_score(student_id, +5)
-        elif (today - last_date).days > 1:
+        elif days_since > 1:
             self.reset_streak(student_id)
             self.update_student_score(student_id, -5)
 
     def get_reading_history(self, student_id: int):
         return self.fetchall(
-            "SELECT rh.*, b.Title FROM ReadingHistory rh JOIN Book b ON rh.BookID=b.BookID WHERE rh.StudentID=? ORDER BY rh.StartDate DESC",
+            "SELECT rh.*, b.Title FROM ReadingHistory rh JOIN Book b ON rh.BookID=b.BookID WHERE rh.StudentID=? ORDER BY rh.StartTs DESC",
             (student_id,),
         )
 
+    # =====================================================
+    # =============== LOAN QUERIES ========================
+    # =====================================================
+    def get_overdue_loans(self, as_of: Optional[date] = None):
+        """Open loans whose due day is before as_of (default today)."""
+        day = epoch_day(as_of or date.today())
+        return self.fetchall(
+            "SELECT BorrowID, StudentID, BookID, DueDay FROM BorrowedBooks "
+            "WHERE Status='Borrowed' AND DueDay < ? ORDER BY DueDay",
+            (day,),
+        )
+
+    def get_borrow_history(self, student_id: int, since: Optional[date] = None):
+        """A student's loans, newest first, optionally limited to those borrowed on/after since."""
+        if since is None:
+            return self.fetchall(
+                "SELECT * FROM BorrowedBooks WHERE StudentID=? ORDER BY BorrowDay DESC",
+                (student_id,),
+            )
+        return self.fetchall(
+            "SELECT * FROM BorrowedBooks WHERE StudentID=? AND BorrowDay >= ? ORDER BY BorrowDay DESC",
+            (student_id, epoch_day(since)),
+        )
+
+    def list_loans(self):
+        return self.fetchall("SELECT * FROM BorrowedBooks ORDER BY BorrowDay DESC, BorrowID DESC")
+
     # =====================================================
     # =============== REPORTS & LEADERBOARDS ==============
     # =====================================================
@@ -0,0 +1,274 @@
+"""
+federation.py
+Federated Multi-Branch Catalog
+------------------------------
+Handles:
+- One connection per branch library.db, queried in parallel from a thread pool
+- Cross-branch search, availability and leaderboards, merged top-K with heapq
+- Tagging every result with the branch it came from
+- Inter-branch loan records (BranchLoan) kept on the lending branch
+- A benchmark across many large branch databases
+
+sqlite3 releases the GIL while a statement runs, so branch queries overlap
+even though they are issued from Python threads.
+
+Usage:
+    python federation.py --branches 8 --books 250000   # build and benchmark
+"""
+
+import heapq
+import itertools
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from database import Database, epoch_seconds, release_book
+
+
+class FederationError(Exception):
+    """Raised when an inter-branch operation cannot be completed."""
+
+
+# ---------- Federated Catalog ----------
+class FederatedCatalog:
+    def __init__(self, branches: Dict[str, str], max_workers: Optional[int] = None):
+        """branches maps a branch name (e.g. 'Main Campus') to its database file."""
+        missing = [path for path in branches.values() if not os.path.exists(path)]
+        if missing:
+            raise FileNotFoundError(f"Branch database(s) not found: {', '.join(missing)}")
+        self.branches = dict(branches)
+        self._conns: Dict[str, sqlite3.Connection] = {}
+        self._locks = {name: threading.Lock() for name in self.branches}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or len(self.branches),
+                                        thread_name_prefix="branch")
+        self.last_errors: Dict[str, str] = {}
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        for conn in self._conns.values():
+            conn.close()
+        self._conns.clear()
+
+    def _conn(self, branch: str) -> sqlite3.Connection:
+        # Each connection is only ever used under its branch lock, so it is
+        # safe to share across the pool's threads.
+        conn = self._conns.get(branch)
+        if conn is None:
+            conn = sqlite3.connect(self.branches[branch], check_same_thread=False, timeout=5)
+            conn.row_factory = sqlite3.Row
+            self._conns[branch] = conn
+        return conn
+
+    def _run(self, branch: str, fn: Callable):
+        with self._locks[branch]:
+            return fn(self._conn(branch))
+
+    def _fan_out(self, fn: Callable) -> Dict[str, list]:
+        """Run fn(conn) on every branch in parallel; unreachable branches are skipped."""
+        futures = {name: self._pool.submit(self._run, name, fn) for name in self.branches}
+        results, errors = {}, {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except sqlite3.Error as e:
+                errors[name] = str(e)
+        self.last_errors = errors
+        return results
+
+    @staticmethod
+    def _tagged(results: Dict[str, list]) -> Dict[str, List[dict]]:
+        return {name: [dict(r, Branch=name) for r in rows] for name, rows in results.items()}
+
+    # =====================================================
+    # =============== CATALOG =============================
+    # =====================================================
+    def search_books(self, keyword: str, limit: int = 50, available_only: bool = False) -> List[dict]:
+        """Title/Author/Category match across branches, merged in Title order."""
+        key = f"%{keyword}%"
+        status_filter = "AND AvailabilityStatus='Available'" if available_only else ""
+
+        def query(conn):
+            return conn.execute(
+                "SELECT BookID, Title, Author, Category, AvailabilityStatus FROM Book "
+                f"WHERE (Title LIKE ? OR Author LIKE ? OR Category LIKE ?) {status_filter} "
+                "ORDER BY Title, BookID LIMIT ?",
+                (key, key, key, limit),
+            ).fetchall()
+
+        streams = self._tagged(self._fan_out(query))
+        merged = heapq.merge(*streams.values(), key=lambda r: (r["Title"], r["Branch"], r["BookID"]))
+        return list(itertools.islice(merged, limit))
+
+    def find_available(self, keyword: str, limit: int = 50) -> List[dict]:
+        return self.search_books(keyword, limit, available_only=True)
+
+    def availability(self, keyword: str) -> Dict[str, dict]:
+        """Per-branch count of matching copies and how many are Available."""
+        key = f"%{keyword}%"
+
+        def query(conn):
+            return conn.execute(
+                "SELECT COUNT(*) AS Total, "
+                "COALESCE(SUM(AvailabilityStatus='Available'), 0) AS Available FROM Book "
+                "WHERE Title LIKE ? OR Author LIKE ?",
+                (key, key),
+            ).fetchone()
+
+        return {name: dict(row) for name, row in self._fan_out(query).items()}
+
+    # =====================================================
+    # =============== LEADERBOARD =========================
+    # =====================================================
+    def top_readers(self, limit: int = 10) -> List[dict]:
+        """Federation-wide leaderboard: each branch's top K merged by Score."""
+
+        def query(conn):
+            return conn.execute(
+                "SELECT StudentID, FullName, Score, ReadingStreak FROM Student ORDER BY Score DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+
+        streams = self._tagged(self._fan_out(query))
+        merged = heapq.merge(*streams.values(), key=lambda r: (-r["Score"], r["Branch"], r["StudentID"]))
+        return list(itertools.islice(merged, limit))
+
+    # =====================================================
+    # =============== INTER-BRANCH LOANS ==================
+    # =====================================================
+    def request_interbranch_loan(self, from_branch: str, book_id: int, to_branch: str,
+                                 student_id: Optional[int] = None) -> int:
+        """Lend an Available copy from one branch to another; returns the LoanID.
+
+        The copy is claimed and the BranchLoan record written on the lending
+        branch in one transaction.
+        """
+        if from_branch not in self.branches or to_branch not in self.branches:
+            raise FederationError("Unknown branch.")
+        if from_branch == to_branch:
+            raise FederationError("A branch cannot lend to itself.")
+
+        def lend(conn):
+            with conn:
+                claimed = conn.execute(
+                    "UPDATE Book SET AvailabilityStatus='Borrowed' WHERE BookID=? AND AvailabilityStatus='Available'",
+                    (book_id,),
+                ).rowcount
+                if not claimed:
+                    raise FederationError(f"Book {book_id} is not available at {from_branch}.")
+                return conn.execute(
+                    "INSERT INTO BranchLoan (BookID, FromBranch, ToBranch, StudentID, RequestedAt, Status) "
+                    "VALUES (?, ?, ?, ?, ?, 'OnLoan')",
+                    (book_id, from_branch, to_branch, student_id, epoch_seconds(datetime.now())),
+                ).lastrowid
+
+        return self._run(from_branch, lend)
+
+    def return_interbranch_loan(self, from_branch: str, loan_id: int) -> Optional[int]:
+        """Close an inter-branch loan at the copy's home branch.
+
+        The copy goes through the same hand-off as Database.return_book
+        (database.release_book), on the pooled branch connection: it is lent
+        to the branch's next holder, or becomes Available. Returns that
+        holder's StudentID, or None.
+        """
+        if from_branch not in self.branches:
+            raise FederationError("Unknown branch.")
+
+        def give_back(conn):
+            with conn:
+                cur = conn.cursor()
+                cur.execute(
+                    "UPDATE BranchLoan SET Status='Returned', ReturnedAt=? WHERE LoanID=? AND Status='OnLoan'",
+                    (epoch_seconds(datetime.now()), loan_id),
+                )
+                if cur.rowcount != 1:
+                    raise FederationError("Invalid or already returned inter-branch loan.")
+                book_id = cur.execute("SELECT BookID FROM BranchLoan WHERE LoanID=?", (loan_id,)).fetchone()["BookID"]
+                return release_book(cur, book_id)
+
+        return self._run(from_branch, give_back)
+
+    def interbranch_loans(self, open_only: bool = True) -> List[dict]:
+        """All inter-branch loans recorded by any branch, newest first."""
+        status_filter = "WHERE Status='OnLoan'" if open_only else ""
+
+        def query(conn):
+            return conn.execute(
+                f"SELECT * FROM BranchLoan {status_filter} ORDER BY RequestedAt DESC, LoanID DESC"
+            ).fetchall()
+
+        streams = self._tagged(self._fan_out(query))
+        return list(heapq.merge(*streams.values(), key=lambda r: (-r["RequestedAt"], r["Branch"], -r["LoanID"])))
+
+
+# --------------- BENCHMARK ---------------
+def build_branch(path: str, books: int, students: int, seed: int):
+    import random
+
+    rng = random.Random(seed)
+    words = ["Data", "History", "Intro", "Python", "Art", "Science", "Volume", "Theory", "World", "Systems"]
+    db = Database(path)
+    db.cursor.executemany(
+        "INSERT INTO Book (Title, Author, Category, AvailabilityStatus) VALUES (?, ?, ?, ?)",
+        (
+            (f"{rng.choice(words)} {rng.choice(words)} {i}", f"Author {i % 5000}",
+             rng.choice(("Science", "Arts", "Engineering")), "Available" if rng.random() < 0.7 else "Borrowed")
+            for i in range(books)
+        ),
+    )
+    db.cursor.executemany(
+        "INSERT INTO Student (FullName, Score) VALUES (?, ?)",
+        ((f"Student {seed}-{i}", rng.randint(0, 1000)) for i in range(students)),
+    )
+    db.conn.commit()
+    db.close()
+
+
+def benchmark(n_branches: int = 8, books: int = 250_000, students: int = 5_000, directory: str = "federation_bench"):
+    import time
+
+    os.makedirs(directory, exist_ok=True)
+    branches = {}
+    for b in range(n_branches):
+        path = os.path.join(directory, f"branch{b}.db")
+        if not os.path.exists(path):
+            build_branch(path, books, students, seed=b)
+        branches[f"Branch {b}"] = path
+
+    def timed(fn, repeat=3):
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        return best * 1000
+
+    print(f"{n_branches} branches x {books:,} books")
+    print(f"{'query':<22}{'sequential ms':>15}{'parallel ms':>13}{'speedup':>9}")
+    serial, parallel = FederatedCatalog(branches, max_workers=1), FederatedCatalog(branches)
+    try:
+        for label, call in (
+            ("search 'Python 12'", lambda c: c.search_books("Python 12", 50)),
+            ("find_available 'Art'", lambda c: c.find_available("Art", 50)),
+            ("availability 'Theory'", lambda c: c.availability("Theory")),
+            ("top_readers(10)", lambda c: c.top_readers(10)),
+        ):
+            s_ms, p_ms = timed(lambda: call(serial)), timed(lambda: call(parallel))
+            print(f"{label:<22}{s_ms:>15.1f}{p_ms:>13.1f}{s_ms / p_ms:>8.1f}x")
+    finally:
+        serial.close()
+        parallel.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark federated queries across branch databases.")
+    parser.add_argument("--branches", type=int, default=8)
+    parser.add_argument("--books", type=int, default=250_000)
+    parser.add_argument("--dir", default="federation_bench")
+    args = parser.parse_args()
+    benchmark(args.branches, args.books, directory=args.dir)
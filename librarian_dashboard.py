@@ -1,6 +1,9 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from database import Database
+from utils import SearchBar, draw_histogram
+from analytics import ReadingAnalytics
+from cdc import ChangeFeed
 import csv
 from datetime import datetime
 
@@ -8,7 +11,10 @@ from datetime import datetime
 class LibrarianDashboard:
     def __init__(self, librarian_id):
         self.db = Database()
+        self.analytics = ReadingAnalytics(self.db)
         self.librarian_id = librarian_id
+        self.db.expire_holds()
+        ChangeFeed(self.db).prune()  # apply journal retention
 
         self.root = tk.Tk()
         self.root.title("Librarian Dashboard")
@@ -27,6 +33,7 @@ class LibrarianDashboard:
         self.manage_tab(tabs)
         self.reports_tab(tabs)
         self.leaderboard_tab(tabs)
+        self.analytics_tab(tabs)
 
         tk.Label(self.root, text="Crystal Heights Library System  |  © 2025",
                  bg="#e9eef5", fg="#333", anchor="center", font=("Segoe UI", 9)).pack(fill="x", pady=3)
@@ -55,6 +62,8 @@ class LibrarianDashboard:
         ttk.Button(form, text="Add Book", command=self.add_book).grid(row=1, column=3, padx=5)
         ttk.Button(form, text="Delete Selected", command=self.delete_book).grid(row=1, column=4, padx=5)
 
+        self.search_bar = SearchBar(tab, self.db, self.show_search_results)
+
         cols = ("BookID", "Title", "Author", "Category", "Status")
         self.book_tree = ttk.Treeview(tab, columns=cols, show="headings")
         for c in cols:
@@ -69,6 +78,15 @@ class LibrarianDashboard:
             self.book_tree.insert("", "end", values=(
                 b["BookID"], b["Title"], b["Author"], b["Category"], b["AvailabilityStatus"]))
 
+    def show_search_results(self, books):
+        if books is None:
+            self.load_books()
+            return
+        self.book_tree.delete(*self.book_tree.get_children())
+        for b in books:
+            self.book_tree.insert("", "end", values=(
+                b["BookID"], b["Title"], b["Author"], b["Category"], b["AvailabilityStatus"]))
+
     def add_book(self):
         title = self.title_entry.get().strip()
         author = self.author_entry.get().strip()
@@ -218,7 +236,7 @@ class LibrarianDashboard:
 
     def load_borrowed_books(self):
         self.borrow_tree.delete(*self.borrow_tree.get_children())
-        for r in self.db.fetchall("SELECT * FROM BorrowedBooks ORDER BY BorrowDate DESC"):
+        for r in self.db.list_loans():
             self.borrow_tree.insert("", "end", values=(
                 r["BorrowID"], r["StudentID"], r["BookID"], r["BorrowDate"], r["DueDate"], r["ReturnDate"], r["Status"]))
 
@@ -270,6 +288,43 @@ class LibrarianDashboard:
         self.leader_tree.tag_configure("silver", background="#e6e6e6")
         self.leader_tree.tag_configure("bronze", background="#f4d1a4")
 
+    # ------------------- READING ANALYTICS -------------------
+    def analytics_tab(self, notebook):
+        tab = ttk.Frame(notebook)
+        notebook.add(tab, text="Analytics")
+
+        self.analytics_label = tk.Label(tab, text="", font=("Segoe UI", 11), justify="left")
+        self.analytics_label.pack(pady=5)
+        self.analytics_canvas = tk.Canvas(tab, width=900, height=140, bg="white")
+        self.analytics_canvas.pack(pady=5)
+
+        cols = ("BookID", "Title", "Sessions", "Completion %", "Median Minutes", "Abandoned")
+        self.analytics_tree = ttk.Treeview(tab, columns=cols, show="headings", height=8)
+        for c in cols:
+            self.analytics_tree.heading(c, text=c)
+            self.analytics_tree.column(c, width=140)
+        self.analytics_tree.pack(expand=True, fill="both", padx=10, pady=5)
+
+        ttk.Button(tab, text="Refresh Analytics", command=self.load_analytics).pack(pady=5)
+        tab.bind("<Map>", lambda e: self.load_analytics())
+
+    def load_analytics(self):
+        s = self.analytics.summary()
+        median = f"{s['median_minutes']:.0f} min" if s["median_minutes"] is not None else "-"
+        self.analytics_label.config(text=(
+            f"Sessions: {s['sessions']}   Completion rate: {s['completion_rate']:.0%}   "
+            f"Median session: {median}   Abandoned: {s['abandoned']}"
+        ))
+        draw_histogram(self.analytics_canvas, s["hour_histogram"], list(range(24)))
+
+        self.analytics_tree.delete(*self.analytics_tree.get_children())
+        top = sorted(self.analytics.per_book().items(), key=lambda kv: kv[1]["sessions"], reverse=True)[:50]
+        titles = {b["BookID"]: b["Title"] for b in self.db.get_books_by_ids([book_id for book_id, _ in top])}
+        for book_id, st in top:
+            self.analytics_tree.insert("", "end", values=(
+                book_id, titles.get(book_id, "(deleted)"), st["sessions"], f"{st['completion_rate']:.0%}",
+                "-" if st["median_minutes"] is None else f"{st['median_minutes']:.0f}", st["abandoned"]))
+
 
 if __name__ == "__main__":
     LibrarianDashboard(1)
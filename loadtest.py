@@ -0,0 +1,379 @@
+"""
+loadtest.py
+Concurrency Load Test for library.db
+------------------------------------
+Handles:
+- Seeding a throwaway database with books, students and logins
+- Spawning N worker processes x T threads, each with its own Database
+- Running a weighted mix of verify_user, search_books, borrow_book,
+  return_book, start_reading and finish_reading
+- Recording throughput, latency percentiles, busy/lock retries and errors
+- Checking data invariants (e.g. a book marked Available with an open loan)
+- Sweeping journal modes and busy timeouts to compare settings
+
+Usage:
+    python loadtest.py --processes 4 --threads 2 --duration 10
+    python loadtest.py --journal-mode delete,wal --busy-timeout 0,100,1000
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from database import Database, hash_password
+
+OPERATIONS = ("verify_user", "search_books", "borrow_book", "return_book", "start_reading", "finish_reading")
+DEFAULT_MIX = "verify_user=20,search_books=30,borrow_book=15,return_book=15,start_reading=10,finish_reading=10"
+STUDENT_PASSWORD = "student123"
+SEARCH_WORDS = ("Data", "History", "Intro", "Python", "Art", "Smith", "Science", "Volume")
+
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    """Parse 'op=weight,op=weight' into a dict, rejecting unknown operations."""
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{name}'. Choose from: {', '.join(OPERATIONS)}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def is_busy_error(e: Exception) -> bool:
+    msg = str(e).lower()
+    return isinstance(e, sqlite3.OperationalError) and ("locked" in msg or "busy" in msg)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+# =====================================================
+# =============== SEEDING =============================
+# =====================================================
+def seed_database(path: str, books: int, students: int, journal_mode: str, seed: int = 42):
+    """Create a fresh database at path with synthetic books, students and logins."""
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    rng = random.Random(seed)
+    db = Database(path)
+    db.conn.execute(f"PRAGMA journal_mode={journal_mode}")
+    db.cursor.executemany(
+        "INSERT INTO Book (Title, Author, Category) VALUES (?, ?, ?)",
+        (
+            (f"{rng.choice(SEARCH_WORDS)} {rng.choice(SEARCH_WORDS)} {i}",
+             f"Author {rng.choice(SEARCH_WORDS)} {i % 500}",
+             rng.choice(("Science", "Arts", "Engineering", "Fiction")))
+            for i in range(books)
+        ),
+    )
+    pw = hash_password(STUDENT_PASSWORD)
+    for i in range(1, students + 1):
+        db.cursor.execute(
+            "INSERT INTO Student (FullName, Course, Level) VALUES (?, ?, ?)",
+            (f"Student {i}", "Computing", str(rng.choice((100, 200, 300, 400)))),
+        )
+        db.cursor.execute(
+            "INSERT INTO Users (Username, PasswordHash, Role, ReferenceID) VALUES (?, ?, 'Student', ?)",
+            (f"student{i}", pw, db.cursor.lastrowid),
+        )
+    db.conn.commit()
+    db.close()
+
+
+# =====================================================
+# =============== WORKERS =============================
+# =====================================================
+class Worker:
+    """One thread's connection, random stream and counters."""
+
+    def __init__(self, config: dict, worker_seed: int):
+        self.config = config
+        self.rng = random.Random(worker_seed)
+        self.latencies = defaultdict(list)
+        self.counters = defaultdict(int)
+        self.db = self._connect()
+
+    def _connect(self) -> Database:
+        # Opening a Database runs the schema script, which can itself hit a lock.
+        while True:
+            try:
+                db = Database(self.config["db"])
+                break
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e):
+                    raise
+                self.counters["busy_on_connect"] += 1
+                time.sleep(0.01)
+        db.conn.execute(f"PRAGMA busy_timeout={int(self.config['busy_timeout'])}")
+        db.conn.execute(f"PRAGMA journal_mode={self.config['journal_mode']}")
+        return db
+
+    # ---------- argument pickers (not timed) ----------
+    def _student(self) -> int:
+        return self.rng.randint(1, self.config["students"])
+
+    def _book(self) -> int:
+        return self.rng.randint(1, self.config["books"])
+
+    def _prepare(self, op: str):
+        """Return the call for op, or None if there is nothing to act on."""
+        db = self.db
+        if op == "verify_user":
+            sid = self._student()
+            return lambda: db.verify_user(f"student{sid}", STUDENT_PASSWORD)
+        if op == "search_books":
+            word = self.rng.choice(SEARCH_WORDS)
+            return lambda: db.search_books(word)
+        if op == "borrow_book":
+            sid, bid = self._student(), self._book()
+            return lambda: db.borrow_book(sid, bid, 1)
+        if op == "return_book":
+            row = db.fetchone(
+                "SELECT BorrowID FROM BorrowedBooks WHERE StudentID=? AND Status='Borrowed' LIMIT 1",
+                (self._student(),),
+            )
+            return (lambda: db.return_book(row["BorrowID"])) if row else None
+        if op == "start_reading":
+            sid, bid = self._student(), self._book()
+            return lambda: db.start_reading(sid, bid)
+        if op == "finish_reading":
+            row = db.fetchone(
+                "SELECT ReadingID FROM ReadingHistory WHERE StudentID=? AND Completed=0 LIMIT 1",
+                (self._student(),),
+            )
+            return (lambda: db.finish_reading(row["ReadingID"])) if row else None
+        raise ValueError(op)
+
+    def run_one(self, op: str):
+        try:
+            call = self._prepare(op)
+        except sqlite3.OperationalError as e:
+            if not is_busy_error(e):
+                raise
+            self.db.conn.rollback()
+            self.counters["busy_errors"] += 1
+            return
+        if call is None:
+            self.counters[f"{op}_skipped"] += 1
+            return
+
+        # One clock for the whole operation, so failed attempts and backoff
+        # sleeps count towards latency.
+        started = time.perf_counter()
+        outcome = "failed"
+        for attempt in range(self.config["retries"] + 1):
+            try:
+                call()
+                outcome = "ok"
+            except Exception as e:
+                self.db.conn.rollback()
+                if isinstance(e, sqlite3.OperationalError) and is_busy_error(e):
+                    self.counters["busy_errors"] += 1
+                    if attempt < self.config["retries"]:
+                        self.counters["lock_retries"] += 1
+                        time.sleep(self.rng.uniform(0, 0.002 * (2 ** attempt)))
+                        continue
+                elif type(e) is Exception:
+                    # Domain rejections such as "Book not available for borrowing."
+                    # are raised as plain Exception by database.py.
+                    outcome = "rejected"
+                else:
+                    # Anything else is a bug or constraint violation under test
+                    outcome = "error"
+                    self.counters[f"error: {type(e).__name__}: {str(e)[:80]}"] += 1
+            break
+
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        if outcome == "ok":
+            self.latencies[op].append(elapsed_ms)
+            self.counters["completed"] += 1
+        else:
+            self.latencies[f"{op}:{outcome}"].append(elapsed_ms)
+            self.counters[outcome] += 1
+            self.counters[f"{op}_{outcome}"] += 1
+
+    def run(self, deadline: float, ops_limit: int):
+        names = list(self.config["mix"])
+        weights = [self.config["mix"][n] for n in names]
+        done = 0
+        while time.perf_counter() < deadline and (not ops_limit or done < ops_limit):
+            self.run_one(self.rng.choices(names, weights)[0])
+            done += 1
+        self.db.close()
+
+
+def _process_main(config: dict, process_index: int) -> dict:
+    """Run config['threads'] workers in this process and return merged results."""
+    deadline = time.perf_counter() + config["duration"]
+    workers = []
+
+    def thread_main(worker_seed: int):
+        # sqlite3 connections are bound to the thread that opened them
+        worker = Worker(config, worker_seed)
+        workers.append(worker)
+        worker.run(deadline, config["ops"])
+
+    threads = [
+        threading.Thread(target=thread_main, args=(config["seed"] * 1000 + process_index * 100 + t,))
+        for t in range(config["threads"])
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    latencies, counters = defaultdict(list), defaultdict(int)
+    for w in workers:
+        for op, values in w.latencies.items():
+            latencies[op].extend(values)
+        for key, value in w.counters.items():
+            counters[key] += value
+    return {"latencies": dict(latencies), "counters": dict(counters)}
+
+
+# =====================================================
+# =============== INVARIANTS ==========================
+# =====================================================
+INVARIANTS = {
+    "available_with_open_loan":
+        "SELECT COUNT(DISTINCT b.BookID) FROM Book b JOIN BorrowedBooks bb "
+        "ON bb.BookID=b.BookID AND bb.Status='Borrowed' WHERE b.AvailabilityStatus='Available'",
+    "multiple_open_loans":
+        "SELECT COUNT(*) FROM (SELECT BookID FROM BorrowedBooks WHERE Status='Borrowed' "
+        "GROUP BY BookID HAVING COUNT(*) > 1)",
+    # Copies lent to another branch are Borrowed with an open BranchLoan instead
+    "borrowed_without_open_loan":
+        "SELECT COUNT(*) FROM Book b WHERE b.AvailabilityStatus='Borrowed' AND NOT EXISTS "
+        "(SELECT 1 FROM BorrowedBooks bb WHERE bb.BookID=b.BookID AND bb.Status='Borrowed') AND NOT EXISTS "
+        "(SELECT 1 FROM BranchLoan bl WHERE bl.BookID=b.BookID AND bl.Status='OnLoan')",
+    "returned_without_return_day":
+        "SELECT COUNT(*) FROM BorrowedBooks WHERE Status='Returned' AND ReturnDay IS NULL",
+    "completed_without_end":
+        "SELECT COUNT(*) FROM ReadingHistory WHERE Completed=1 AND EndTs IS NULL",
+}
+
+
+def check_invariants(path: str) -> Dict[str, int]:
+    conn = sqlite3.connect(path)
+    try:
+        return {name: conn.execute(sql).fetchone()[0] for name, sql in INVARIANTS.items()}
+    finally:
+        conn.close()
+
+
+# =====================================================
+# =============== RUNNER ==============================
+# =====================================================
+def run_load_test(config: dict) -> dict:
+    """Seed, run all workers, then summarise throughput, latency and invariants."""
+    seed_database(config["db"], config["books"], config["students"], config["journal_mode"], config["seed"])
+
+    started = time.perf_counter()
+    with multiprocessing.Pool(config["processes"]) as pool:
+        results = pool.starmap(_process_main, [(config, p) for p in range(config["processes"])])
+    elapsed = time.perf_counter() - started
+
+    latencies, counters = defaultdict(list), defaultdict(int)
+    for r in results:
+        for op, values in r["latencies"].items():
+            latencies[op].extend(values)
+        for key, value in r["counters"].items():
+            counters[key] += value
+
+    # Successful operations first, then rejected/failed ones where they occurred
+    labels = list(OPERATIONS) + sorted(k for k in latencies if ":" in k)
+    summary = {}
+    for op in labels:
+        values = sorted(latencies.get(op, []))
+        summary[op] = {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 50), 3),
+            "p95_ms": round(percentile(values, 95), 3),
+            "p99_ms": round(percentile(values, 99), 3),
+            "max_ms": round(values[-1], 3) if values else 0.0,
+        }
+
+    return {
+        "journal_mode": config["journal_mode"],
+        "busy_timeout": config["busy_timeout"],
+        "workers": config["processes"] * config["threads"],
+        "elapsed_s": round(elapsed, 3),
+        "throughput_ops_s": round(counters["completed"] / elapsed, 1) if elapsed else 0.0,
+        "operations": summary,
+        "counters": dict(counters),
+        "invariants": check_invariants(config["db"]),
+    }
+
+
+def print_report(report: dict):
+    print(f"\n=== journal_mode={report['journal_mode']}  busy_timeout={report['busy_timeout']}ms  "
+          f"workers={report['workers']} ===")
+    c = report["counters"]
+    print(f"Throughput: {report['throughput_ops_s']} ops/s over {report['elapsed_s']}s  |  "
+          f"busy errors: {c.get('busy_errors', 0)}  lock retries: {c.get('lock_retries', 0)}  "
+          f"rejected: {c.get('rejected', 0)}  failed: {c.get('failed', 0)}  errors: {c.get('error', 0)}")
+    print(f"{'operation':<24}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for op, s in report["operations"].items():
+        print(f"{op:<24}{s['count']:>8}{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}{s['max_ms']:>10}")
+    for key in sorted(k for k in c if k.startswith("error: ")):
+        print(f"  {c[key]:>6} x {key[len('error: '):]}")
+    violations = {k: v for k, v in report["invariants"].items() if v}
+    print("Invariants: " + (", ".join(f"{k}={v}" for k, v in violations.items()) if violations else "all hold ✅"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-process load test for the library database.")
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "library_loadtest.db"))
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=2, help="threads per process")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--ops", type=int, default=0, help="max operations per thread (0 = unlimited)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="weighted operation mix, e.g. 'borrow_book=3,return_book=1'")
+    parser.add_argument("--journal-mode", default="delete", help="comma-separated journal modes to try")
+    parser.add_argument("--busy-timeout", default="5000", help="comma-separated busy timeouts in ms to try")
+    parser.add_argument("--retries", type=int, default=3, help="retries after a busy/locked error")
+    parser.add_argument("--books", type=int, default=2000)
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    base = {
+        "db": args.db, "processes": args.processes, "threads": args.threads,
+        "duration": args.duration, "ops": args.ops, "mix": parse_mix(args.mix),
+        "retries": args.retries, "books": args.books, "students": args.students, "seed": args.seed,
+    }
+    reports = []
+    for mode in args.journal_mode.split(","):
+        for timeout in args.busy_timeout.split(","):
+            config = dict(base, journal_mode=mode.strip(), busy_timeout=int(timeout))
+            report = run_load_test(config)
+            print_report(report)
+            reports.append(report)
+
+    if len(reports) > 1:
+        best = max(reports, key=lambda r: (-r["counters"].get("failed", 0), r["throughput_ops_s"]))
+        print(f"\nBest setting: journal_mode={best['journal_mode']} busy_timeout={best['busy_timeout']}ms "
+              f"({best['throughput_ops_s']} ops/s, {best['counters'].get('failed', 0)} failed)")
+    return reports
+
+
+if __name__ == "__main__":
+    results = main()
+    # Unexpected exceptions or broken invariants fail the run
+    if any(r["counters"].get("error", 0) or any(r["invariants"].values()) for r in results):
+        sys.exit(1)
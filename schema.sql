@@ -50,6 +50,9 @@ CREATE TABLE IF NOT EXISTS BorrowedBooks (
     DueDate TEXT,
     ReturnDate TEXT,
     Status TEXT DEFAULT 'Borrowed',
+    BorrowDay INTEGER,             -- epoch-day (days since 1970-01-01) of BorrowDate
+    DueDay INTEGER,                -- epoch-day of DueDate
+    ReturnDay INTEGER,             -- epoch-day of ReturnDate
     FOREIGN KEY (StudentID) REFERENCES Student(StudentID),
     FOREIGN KEY (BookID) REFERENCES Book(BookID),
     FOREIGN KEY (LibrarianID) REFERENCES Librarian(LibrarianID)
@@ -64,10 +67,44 @@ CREATE TABLE IF NOT EXISTS ReadingHistory (
     EndDate TEXT,
     DurationMinutes INTEGER,
     Completed INTEGER DEFAULT 0,   -- 1 if the student finished the book/session
+    StartTs INTEGER,               -- epoch-seconds (wall clock) of StartDate
+    EndTs INTEGER,                 -- epoch-seconds (wall clock) of EndDate
     FOREIGN KEY (StudentID) REFERENCES Student(StudentID),
     FOREIGN KEY (BookID) REFERENCES Book(BookID)
 );
 
+-- Hold: reservation queue for borrowed books, served by Priority then CreatedAt
+CREATE TABLE IF NOT EXISTS Hold (
+    HoldID INTEGER PRIMARY KEY AUTOINCREMENT,
+    StudentID INTEGER,
+    BookID INTEGER,
+    Priority INTEGER DEFAULT 0,    -- higher is served first (see Database.HOLD_*_WEIGHT)
+    CreatedAt INTEGER,             -- epoch-seconds (wall clock)
+    ExpiresAt INTEGER,             -- epoch-seconds; NULL never expires
+    Status TEXT DEFAULT 'Active',  -- 'Active', 'Fulfilled', 'Expired' or 'Cancelled'
+    BorrowID INTEGER,              -- loan created when the hold was fulfilled
+    FOREIGN KEY (StudentID) REFERENCES Student(StudentID),
+    FOREIGN KEY (BookID) REFERENCES Book(BookID),
+    FOREIGN KEY (BorrowID) REFERENCES BorrowedBooks(BorrowID)
+);
+CREATE INDEX IF NOT EXISTS idx_hold_book_created ON Hold (BookID, CreatedAt);
+CREATE INDEX IF NOT EXISTS idx_hold_queue ON Hold (BookID, Priority DESC, CreatedAt, HoldID) WHERE Status='Active';
+CREATE INDEX IF NOT EXISTS idx_hold_status_expires ON Hold (Status, ExpiresAt);
+
+-- BranchLoan: copies lent to another campus, recorded on the lending branch
+CREATE TABLE IF NOT EXISTS BranchLoan (
+    LoanID INTEGER PRIMARY KEY AUTOINCREMENT,
+    BookID INTEGER,
+    FromBranch TEXT NOT NULL,      -- lending branch (this database)
+    ToBranch TEXT NOT NULL,        -- borrowing branch
+    StudentID INTEGER,             -- requesting student at the borrowing branch, if any
+    RequestedAt INTEGER,           -- epoch-seconds (wall clock)
+    ReturnedAt INTEGER,            -- epoch-seconds (wall clock)
+    Status TEXT DEFAULT 'OnLoan',  -- 'OnLoan' or 'Returned'
+    FOREIGN KEY (BookID) REFERENCES Book(BookID)
+);
+CREATE INDEX IF NOT EXISTS idx_branchloan_status ON BranchLoan (Status, RequestedAt);
+
 -- Users: authentication table (links to Student or Librarian via ReferenceID)
 CREATE TABLE IF NOT EXISTS Users (
     UserID INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -77,3 +114,97 @@ CREATE TABLE IF NOT EXISTS Users (
     ReferenceID INTEGER           -- references StudentID or LibrarianID depending on Role
 );
 -- ALTER TABLE Users ADD COLUMN IsActive INTEGER DEFAULT 1;
+
+-- ================================
+-- CHANGE DATA CAPTURE (see cdc.py)
+-- ================================
+
+-- ChangeLog: append-only journal of row changes, read by ChangeID watermark
+CREATE TABLE IF NOT EXISTS ChangeLog (
+    ChangeID INTEGER PRIMARY KEY AUTOINCREMENT,
+    TableName TEXT NOT NULL,
+    RowKey INTEGER NOT NULL,       -- primary key of the changed row
+    Op TEXT NOT NULL,              -- 'I'nsert, 'U'pdate or 'D'elete
+    ChangedAt INTEGER              -- epoch-seconds (wall clock)
+);
+
+-- ChangeConsumer: highest ChangeID each downstream consumer has acknowledged
+CREATE TABLE IF NOT EXISTS ChangeConsumer (
+    Name TEXT PRIMARY KEY,
+    Watermark INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS cdc_book_insert AFTER INSERT ON Book BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, Op, ChangedAt)
+    VALUES ('Book', NEW.BookID, 'I', CAST(strftime('%s', 'now', 'localtime') AS INTEGER));
+END;
+
+CREATE TRIGGER IF NOT EXISTS cdc_book_update AFTER UPDATE ON Book BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, Op, ChangedAt)
+    VALUES ('Book', NEW.BookID, 'U', CAST(strftime('%s', 'now', 'localtime') AS INTEGER));
+END;
+
+CREATE TRIGGER IF NOT EXISTS cdc_book_delete AFTER DELETE ON Book BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, Op, ChangedAt)
+    VALUES ('Book', OLD.BookID, 'D', CAST(strftime('%s', 'now', 'localtime') AS INTEGER));
+END;
+
+CREATE TRIGGER IF NOT EXISTS cdc_student_insert AFTER INSERT ON Student BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, Op, ChangedAt)
+    VALUES ('Student', NEW.StudentID, 'I', CAST(strftime('%s', 'now', 'localtime') AS INTEGER));
+END;
+
+CREATE TRIGGER IF NOT EXISTS cdc_student_update AFTER UPDATE ON Student BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, Op, ChangedAt)
+    VALUES ('Student', NEW.StudentID, 'U', CAST(strftime('%s', 'now', 'localtime') AS INTEGER));
+END;
+
+CREATE TRIGGER IF NOT EXISTS cdc_student_delete AFTER DELETE ON Student BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, Op, ChangedAt)
+    VALUES ('Student', OLD.StudentID, 'D', CAST(strftime('%s', 'now', 'localtime') AS INTEGER));
+END;
+
+CREATE TRIGGER IF NOT EXISTS cdc_borrowedbooks_insert AFTER INSERT ON BorrowedBooks BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, Op, ChangedAt)
+    VALUES ('BorrowedBooks', NEW.BorrowID, 'I', CAST(strftime('%s', 'now', 'localtime') AS INTEGER));
+END;
+
+CREATE TRIGGER IF NOT EXISTS cdc_borrowedbooks_update AFTER UPDATE ON BorrowedBooks BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, Op, ChangedAt)
+    VALUES ('BorrowedBooks', NEW.BorrowID, 'U', CAST(strftime('%s', 'now', 'localtime') AS INTEGER));
+END;
+
+CREATE TRIGGER IF NOT EXISTS cdc_borrowedbooks_delete AFTER DELETE ON BorrowedBooks BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, Op, ChangedAt)
+    VALUES ('BorrowedBooks', OLD.BorrowID, 'D', CAST(strftime('%s', 'now', 'localtime') AS INTEGER));
+END;
+
+CREATE TRIGGER IF NOT EXISTS cdc_readinghistory_insert AFTER INSERT ON ReadingHistory BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, Op, ChangedAt)
+    VALUES ('ReadingHistory', NEW.ReadingID, 'I', CAST(strftime('%s', 'now', 'localtime') AS INTEGER));
+END;
+
+CREATE TRIGGER IF NOT EXISTS cdc_readinghistory_update AFTER UPDATE ON ReadingHistory BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, Op, ChangedAt)
+    VALUES ('ReadingHistory', NEW.ReadingID, 'U', CAST(strftime('%s', 'now', 'localtime') AS INTEGER));
+END;
+
+CREATE TRIGGER IF NOT EXISTS cdc_readinghistory_delete AFTER DELETE ON ReadingHistory BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, Op, ChangedAt)
+    VALUES ('ReadingHistory', OLD.ReadingID, 'D', CAST(strftime('%s', 'now', 'localtime') AS INTEGER));
+END;
+
+CREATE TRIGGER IF NOT EXISTS cdc_users_insert AFTER INSERT ON Users BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, Op, ChangedAt)
+    VALUES ('Users', NEW.UserID, 'I', CAST(strftime('%s', 'now', 'localtime') AS INTEGER));
+END;
+
+CREATE TRIGGER IF NOT EXISTS cdc_users_update AFTER UPDATE ON Users BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, Op, ChangedAt)
+    VALUES ('Users', NEW.UserID, 'U', CAST(strftime('%s', 'now', 'localtime') AS INTEGER));
+END;
+
+CREATE TRIGGER IF NOT EXISTS cdc_users_delete AFTER DELETE ON Users BEGIN
+    INSERT INTO ChangeLog (TableName, RowKey, Op, ChangedAt)
+    VALUES ('Users', OLD.UserID, 'D', CAST(strftime('%s', 'now', 'localtime') AS INTEGER));
+END;
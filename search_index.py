@@ -0,0 +1,338 @@
+"""
+search_index.py
+In-memory Book Search Index
+---------------------------
+Handles:
+- Sorted term list for instant prefix autocomplete (bisect)
+- Trigram index over the term vocabulary for typo-tolerant matching
+- Incremental updates, kept in sync by Database.add_book/update_book/delete_book
+
+Titles and authors are split into lowercase terms. Fuzzy matching first maps
+each (possibly misspelled) query word onto vocabulary terms by trigram
+similarity or a small edit distance, then maps those terms onto books. Both
+steps are capped (MAX_TERMS_PER_WORD, MAX_CANDIDATES), so very common words
+such as "the" cost no more than rare ones. Only BookIDs are kept; callers
+fetch titles from the database.
+
+Usage:
+    python search_index.py --books 1000000   # benchmark suggest/search latency
+"""
+
+import bisect
+import heapq
+import itertools
+import re
+import sys
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+_TERM_RE = re.compile(r"[a-z0-9]+")
+
+
+# ---------- Helpers ----------
+def tokenize(text: str) -> List[str]:
+    return _TERM_RE.findall((text or "").lower())
+
+
+def trigrams(term: str) -> Set[str]:
+    """Trigrams of a term padded with '$' so short words and word edges count."""
+    padded = f"${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal-string-alignment (Damerau-Levenshtein) distance, or limit + 1 once it exceeds limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1] if prev[-1] <= limit else limit + 1
+
+
+# ---------- Index ----------
+class BookSearchIndex:
+    MAX_TERMS_PER_WORD = 20   # closest vocabulary terms kept per query word
+    MAX_EDIT_CHECKS = 100     # edit-distance comparisons per query word
+    MAX_CANDIDATES = 2000     # books scored per search
+    SUGGEST_SCAN = 200_000    # postings walked per suggest()
+    BUILD_BATCH = 10_000      # rows loaded per lock acquisition in build()
+
+    def __init__(self, fuzzy_threshold: float = 0.35):
+        self.fuzzy_threshold = fuzzy_threshold
+        self._lock = threading.RLock()
+        self._book_terms: Dict[int, Tuple[str, ...]] = {}  # BookID -> its distinct terms
+        self._postings: Dict[str, Set[int]] = {}           # term -> BookIDs
+        self._gram_terms: Dict[str, Set[str]] = defaultdict(set)  # trigram -> terms
+        self._term_grams: Dict[str, int] = {}              # term -> number of trigrams
+        self._sorted_terms: List[str] = []                 # vocabulary, sorted
+        self._changed: Set[int] = set()                    # BookIDs edited during build()
+        self._building = False
+
+    def __len__(self):
+        return len(self._book_terms)
+
+    # =====================================================
+    # =============== MAINTENANCE =========================
+    # =====================================================
+    def build(self, rows: Iterable) -> "BookSearchIndex":
+        """Bulk-load (BookID, Title, Author) rows, sorting the vocabulary once.
+
+        Safe to run on a worker thread while add/update/remove are called: the
+        lock is taken per batch, and books edited meanwhile keep their newer
+        entry instead of the row being loaded.
+        """
+        with self._lock:
+            self._building = True
+        try:
+            rows = iter(rows)
+            while True:
+                batch = list(itertools.islice(rows, self.BUILD_BATCH))
+                if not batch:
+                    break
+                with self._lock:
+                    for book_id, title, author in batch:
+                        if book_id not in self._changed:
+                            self._remove(book_id)
+                            self._add(book_id, title, author, keep_sorted=False)
+        finally:
+            with self._lock:
+                self._sorted_terms = sorted(self._postings)
+                self._building = False
+                self._changed.clear()
+        return self
+
+    def add(self, book_id: int, title: str, author: str):
+        with self._lock:
+            if self._building:
+                self._changed.add(book_id)
+            self._remove(book_id)
+            self._add(book_id, title, author, keep_sorted=True)
+
+    def update(self, book_id: int, title: str, author: str):
+        self.add(book_id, title, author)
+
+    def remove(self, book_id: int):
+        with self._lock:
+            if self._building:
+                self._changed.add(book_id)
+            self._remove(book_id)
+
+    def _add(self, book_id, title, author, keep_sorted):
+        # Interned, so every book's term tuple shares one copy of each string
+        terms = tuple(dict.fromkeys(map(sys.intern, tokenize(title) + tokenize(author))))
+        self._book_terms[book_id] = terms
+        for term in terms:
+            books = self._postings.get(term)
+            if books is None:
+                books = self._postings[term] = set()
+                grams = trigrams(term)
+                self._term_grams[term] = len(grams)
+                for gram in grams:
+                    self._gram_terms[gram].add(term)
+                if keep_sorted:
+                    bisect.insort(self._sorted_terms, term)
+            books.add(book_id)
+
+    def _remove(self, book_id):
+        terms = self._book_terms.pop(book_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            books = self._postings[term]
+            books.discard(book_id)
+            if not books:
+                del self._postings[term]
+                del self._term_grams[term]
+                for gram in trigrams(term):
+                    self._gram_terms[gram].discard(term)
+                i = bisect.bisect_left(self._sorted_terms, term)
+                if i < len(self._sorted_terms) and self._sorted_terms[i] == term:
+                    del self._sorted_terms[i]
+
+    # =====================================================
+    # =============== QUERIES =============================
+    # =====================================================
+    def suggest(self, query: str, limit: int = 10) -> List[int]:
+        """BookIDs whose terms match every query word, the last one as a prefix.
+
+        Each prefix term is intersected with the exact words' postings, walking
+        the smallest set; at most SUGGEST_SCAN postings are walked in total.
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+        *exact, prefix = words
+        with self._lock:
+            required = []
+            for word in exact:
+                books = self._postings.get(word)
+                if not books:
+                    return []
+                required.append(books)
+
+            found: Dict[int, None] = {}
+            scanned = 0
+            i = bisect.bisect_left(self._sorted_terms, prefix)
+            while i < len(self._sorted_terms) and len(found) < limit and scanned < self.SUGGEST_SCAN:
+                term = self._sorted_terms[i]
+                if not term.startswith(prefix):
+                    break
+                smallest, *others = sorted(required + [self._postings[term]], key=len)
+                scanned += len(smallest)
+                hits = smallest.intersection(*others) if others else smallest
+                for book_id in itertools.islice(hits, limit - len(found)):
+                    found[book_id] = None
+                i += 1
+            return list(found)
+
+    def _similar_terms(self, word: str) -> Dict[str, float]:
+        """Up to MAX_TERMS_PER_WORD vocabulary terms close to word, with a 0-1 similarity.
+
+        A term matches when its trigram Jaccard similarity passes the threshold,
+        or when it shares a trigram and is within one edit (two for words longer
+        than five letters), counting a transposition as one edit. Edit distance
+        is only computed for the MAX_EDIT_CHECKS terms sharing the most trigrams.
+        """
+        if word in self._postings:
+            return {word: 1.0}
+        grams = trigrams(word)
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for term in self._gram_terms.get(gram, ()):
+                shared[term] += 1
+        max_edits = 1 if len(word) <= 5 else 2
+        matches, near = {}, []
+        for term, n in shared.items():
+            sim = n / (len(grams) + self._term_grams[term] - n)
+            if sim >= self.fuzzy_threshold:
+                matches[term] = sim
+            elif abs(len(term) - len(word)) <= max_edits:
+                near.append((n, term))
+        for _, term in heapq.nlargest(self.MAX_EDIT_CHECKS, near):
+            distance = edit_distance(word, term, max_edits)
+            sim = 1.0 - distance / max(len(word), len(term))
+            if distance <= max_edits and sim >= self.fuzzy_threshold:
+                matches[term] = sim
+        if len(matches) > self.MAX_TERMS_PER_WORD:
+            matches = dict(heapq.nlargest(self.MAX_TERMS_PER_WORD, matches.items(), key=lambda kv: kv[1]))
+        return matches
+
+    def search(self, query: str, limit: int = 50) -> List[int]:
+        """Typo-tolerant search; BookIDs ranked by summed per-word similarity.
+
+        At most MAX_CANDIDATES books are scored: first those containing every
+        word's closest term, then the rarest word's books, closest terms first.
+        Candidates are gathered under the lock; scoring only probes set
+        membership, so it runs without it.
+        """
+        words = tokenize(query)
+        with self._lock:
+            per_word = []
+            for w in words:
+                matches = self._similar_terms(w)
+                if matches:
+                    ranked = sorted(matches.items(), key=lambda kv: -kv[1])
+                    per_word.append([(term, sim, self._postings[term]) for term, sim in ranked])
+            if not per_word:
+                return []
+            per_word.sort(key=lambda terms: sum(len(books) for _, _, books in terms))
+
+            candidates: Dict[int, None] = {}
+            smallest, *others = sorted((terms[0][2] for terms in per_word), key=len)
+            if others:
+                # Intersect a bounded slice, so two very common words stay cheap
+                both = set(itertools.islice(smallest, self.MAX_CANDIDATES * 25)).intersection(*others)
+                for book_id in itertools.islice(both, self.MAX_CANDIDATES):
+                    candidates[book_id] = None
+            for _, _, books in per_word[0]:
+                if len(candidates) >= self.MAX_CANDIDATES:
+                    break
+                for book_id in itertools.islice(books, self.MAX_CANDIDATES - len(candidates)):
+                    candidates[book_id] = None
+
+        scores: Dict[int, float] = {}
+        for book_id in candidates:
+            total = 0.0
+            for terms in per_word:
+                for _, sim, books in terms:
+                    if book_id in books:
+                        total += sim
+                        break
+            scores[book_id] = total
+        return [b for b, _ in heapq.nlargest(limit, scores.items(), key=lambda kv: kv[1])]
+
+    def lookup(self, query: str, limit: int = 50) -> dict:
+        """Autocomplete suggestions plus combined prefix/fuzzy results for one query.
+
+        Both lists hold BookIDs; suggestion_ids are the first prefix matches,
+        for the dropdown.
+        """
+        prefix_ids = self.suggest(query, limit)
+        ids = list(dict.fromkeys(prefix_ids + self.search(query, limit)))[:limit]
+        return {"query": query, "suggestion_ids": prefix_ids[:10], "book_ids": ids}
+
+
+# --------------- BENCHMARK ---------------
+COMMON_WORDS = (
+    "the of and a to in introduction for on with history guide art science world life new modern "
+    "principles theory practice study handbook advanced basic applied systems data design analysis "
+    "english american war love man time story people city house night last first great little"
+).split()
+FIRST_NAMES = ["john", "mary", "james", "jane", "frank", "william", "emily", "george", "charles", "anne"]
+LAST_NAMES = ["tolkien", "austen", "smith", "herbert", "dickens", "orwell", "bronte", "twain", "hardy", "woolf"]
+
+
+def benchmark(n_books: int = 1_000_000, seed: int = 7):
+    """Build an index over titles with a Zipf-like word distribution and time queries."""
+    import random
+    import time
+
+    rng = random.Random(seed)
+    syllables = ["ka", "lo", "ri", "man", "ter", "son", "vel", "dra", "mi", "nor", "shi", "ton", "bel", "quo"]
+    rare = list({"".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(60_000)})
+    vocabulary = COMMON_WORDS + rare
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(vocabulary))))
+    firsts = FIRST_NAMES + rare[:2000]
+    lasts = LAST_NAMES + rare[2000:12000]
+
+    def row(i):
+        title = " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(2, 7))).title()
+        return i, title, f"{rng.choice(firsts).title()} {rng.choice(lasts).title()}"
+
+    started = time.perf_counter()
+    index = BookSearchIndex().build(row(i) for i in range(1, n_books + 1))
+    print(f"Built index for {len(index):,} books ({len(index._sorted_terms):,} terms) "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    for q in ("tolkein", "austin", "smtih", "herbret", "jonh"):
+        print(f"  {q!r:<10} -> {sorted(index._similar_terms(q))[:5]}")
+    for label, fn, queries in (
+        ("suggest", index.suggest, ["the", "introduction t", "hist", "tolk", "ka", "lomi"]),
+        ("search", index.search, ["the", "introduction to", "tolkein", "jonh smtih", "history of the world"]),
+        ("lookup", index.lookup, ["the", "introduction to", "a", "herbret", "austin pride"]),
+    ):
+        timings = []
+        for q in queries * 20:
+            t0 = time.perf_counter()
+            fn(q)
+            timings.append((time.perf_counter() - t0) * 1000)
+        timings.sort()
+        print(f"{label:<8} p50 {timings[len(timings) // 2]:.3f} ms   max {timings[-1]:.3f} ms")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the in-memory book search index.")
+    parser.add_argument("--books", type=int, default=1_000_000)
+    benchmark(parser.parse_args().books)
@@ -1,11 +1,18 @@
+import itertools
 import tkinter as tk
 from tkinter import ttk, messagebox
 from database import Database
+from utils import SearchBar, draw_histogram
+from analytics import ReadingAnalytics
+from catalog_snapshot import CatalogSnapshot
 from datetime import datetime
 
 class StudentDashboard:
     def __init__(self, student_id):
         self.db = Database()
+        self.analytics = ReadingAnalytics(self.db)
+        self.catalog = CatalogSnapshot(self.db)
+        self._fill_job = None
         self.student_id = student_id
         self.root = tk.Tk()
         self.root.title("Student Dashboard")
@@ -45,6 +52,8 @@ class StudentDashboard:
         self.books_tab(frame)
         self.reading_tab(frame)
         self.history_tab(frame)
+        self.holds_tab(frame)
+        self.stats_tab(frame)
         self.badges_tab(frame)
 
         status = tk.Label(self.root, text="📘 Keep reading to grow your streak!", bg="#eaf0f7", fg="#333", anchor="w")
@@ -56,6 +65,20 @@ class StudentDashboard:
     def books_tab(self, notebook):
         tab = ttk.Frame(notebook)
         notebook.add(tab, text="Library Books")
+        self.search_bar = SearchBar(tab, self.db, self.show_search_results)
+
+        filters = tk.Frame(tab)
+        filters.pack(fill="x", padx=10, pady=(5, 0))
+        tk.Label(filters, text="Category:").pack(side="left")
+        self.category_filter = ttk.Combobox(filters, width=20, state="readonly")
+        self.category_filter.pack(side="left", padx=5)
+        tk.Label(filters, text="Status:").pack(side="left")
+        self.status_filter = ttk.Combobox(filters, width=15, state="readonly")
+        self.status_filter.pack(side="left", padx=5)
+        for box in (self.category_filter, self.status_filter):
+            box.set("All")
+            box.bind("<<ComboboxSelected>>", lambda e: self.load_books())
+
         columns = ("ID", "Title", "Author", "Category", "Status")
         self.book_tree = ttk.Treeview(tab, columns=columns, show="headings")
         for col in columns:
@@ -66,12 +89,42 @@ class StudentDashboard:
         self.load_books()
 
     def load_books(self):
+        # Apply changes since the last load instead of re-reading the whole catalog
+        self.catalog.refresh()
+        category = self.category_filter.get()
+        status = self.status_filter.get()
+        rows = self.catalog.filter(
+            category=None if category in ("", "All") else category,
+            status=None if status in ("", "All") else status,
+        )
+        if self._fill_job is not None:
+            self.root.after_cancel(self._fill_job)
+        self.book_tree.delete(*self.book_tree.get_children())
+        self._fill_books(rows)
+
+    def _fill_books(self, rows, batch=1000):
+        """Insert rows into the tree a batch at a time so the window stays responsive."""
+        chunk = list(itertools.islice(rows, batch))
+        for values in chunk:
+            self.book_tree.insert("", "end", values=values)
+        if len(chunk) == batch:
+            self._fill_job = self.root.after(1, self._fill_books, rows, batch)
+            return
+        self._fill_job = None
+        self.category_filter["values"] = ["All"] + self.catalog.category_names()
+        self.status_filter["values"] = ["All"] + self.catalog.status_names()
+
+    def show_search_results(self, books):
+        if books is None:
+            self.load_books()
+            return
+        if self._fill_job is not None:
+            self.root.after_cancel(self._fill_job)
+            self._fill_job = None
         self.book_tree.delete(*self.book_tree.get_children())
-        books = self.db.fetchall("SELECT * FROM Book")
         for b in books:
             self.book_tree.insert("", "end", values=(
-                b["BookID"], b["Title"], b["Author"], b["Category"], b["AvailabilityStatus"]
-            ))
+                b["BookID"], b["Title"], b["Author"], b["Category"], b["AvailabilityStatus"]))
 
     def borrow_selected(self):
         selected = self.book_tree.focus()
@@ -81,7 +134,10 @@ class StudentDashboard:
         book_data = self.book_tree.item(selected)["values"]
         book_id, title, status = book_data[0], book_data[1], book_data[4]
         if str(status).lower() == "borrowed":
-            messagebox.showwarning("Unavailable", f"'{title}' is currently borrowed by another student.")
+            if messagebox.askyesno("Unavailable",
+                                   f"'{title}' is currently borrowed by another student.\n"
+                                   "Place a hold? It will be lent to you automatically when returned."):
+                self.place_hold(book_id, title)
             return
         try:
             self.db.borrow_book(self.student_id, book_id, 1)
@@ -139,12 +195,29 @@ class StudentDashboard:
             return
         # mark reading completed (this updates score/streak in db.finish_reading)
         self.db.finish_reading(reading["ReadingID"])
-        # update book availability to Available
-        self.db.execute("UPDATE Book SET AvailabilityStatus='Available' WHERE BookID=?", (book_id,))
-        messagebox.showinfo("Done", "Book marked as finished and is now available.")
+        # return the loan so the book goes to the next holder, or becomes available
+        loan = self.db.fetchone(
+            "SELECT BorrowID FROM BorrowedBooks WHERE StudentID=? AND BookID=? AND Status='Borrowed'",
+            (self.student_id, book_id)
+        )
+        if loan:
+            holder = self.db.return_book(loan["BorrowID"])
+        else:
+            # No loan of ours: release the book through the hold queue, unless
+            # someone else has it out.
+            with self.db.conn:
+                lent = self.db.fetchone(
+                    "SELECT 1 FROM BorrowedBooks WHERE BookID=? AND Status='Borrowed'", (book_id,)
+                )
+                holder = None if lent else self.db.release_book(book_id)
+        if holder is not None:
+            messagebox.showinfo("Done", "Book marked as finished and passed to the next student on hold.")
+        else:
+            messagebox.showinfo("Done", "Book marked as finished.")
         self.load_reading_books()
         self.load_books()
         self.load_history()
+        self.load_holds()
         self.update_display()
         self.show_motivation()
 
@@ -169,6 +242,68 @@ class StudentDashboard:
                 h["Title"], h["StartDate"], h["EndDate"], h["DurationMinutes"], "Yes" if h["Completed"] else "No"
             ))
 
+    # Holds tab: queued reservations for borrowed books
+    def holds_tab(self, notebook):
+        tab = ttk.Frame(notebook)
+        notebook.add(tab, text="My Holds")
+        cols = ("Hold ID", "Book Title", "Status", "Queue Position")
+        self.holds_tree = ttk.Treeview(tab, columns=cols, show="headings")
+        for c in cols:
+            self.holds_tree.heading(c, text=c)
+            self.holds_tree.column(c, width=150)
+        self.holds_tree.pack(expand=True, fill="both", padx=10, pady=10)
+        btn_frame = tk.Frame(tab); btn_frame.pack(pady=10)
+        ttk.Button(btn_frame, text="Cancel Hold", command=self.cancel_hold).grid(row=0, column=0, padx=5)
+        ttk.Button(btn_frame, text="Refresh", command=self.load_holds).grid(row=0, column=1, padx=5)
+        self.load_holds()
+
+    def load_holds(self):
+        self.holds_tree.delete(*self.holds_tree.get_children())
+        for h in self.db.get_student_holds(self.student_id):
+            position = self.db.get_hold_position(h["HoldID"]) if h["Status"] == "Active" else ""
+            status = "Ready - lent to you" if h["Status"] == "Fulfilled" else h["Status"]
+            self.holds_tree.insert("", "end", values=(h["HoldID"], h["Title"], status, position))
+
+    def place_hold(self, book_id, title):
+        try:
+            hold_id = self.db.place_hold(self.student_id, book_id)
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            return
+        position = self.db.get_hold_position(hold_id)
+        messagebox.showinfo("Hold Placed", f"You're #{position} in the queue for '{title}'.")
+        self.load_holds()
+
+    def cancel_hold(self):
+        selected = self.holds_tree.focus()
+        if not selected:
+            messagebox.showwarning("Select", "Choose a hold to cancel.")
+            return
+        self.db.cancel_hold(self.holds_tree.item(selected)["values"][0])
+        self.load_holds()
+
+    # Stats tab: personal reading analytics
+    def stats_tab(self, notebook):
+        tab = ttk.Frame(notebook)
+        notebook.add(tab, text="My Stats")
+        self.stats_label = tk.Label(tab, text="", font=("Segoe UI", 11), justify="left")
+        self.stats_label.pack(pady=10)
+        tk.Label(tab, text="When you start reading (hour of day)", font=("Segoe UI", 10, "bold")).pack()
+        self.hours_canvas = tk.Canvas(tab, width=720, height=200, bg="white")
+        self.hours_canvas.pack(pady=5)
+        ttk.Button(tab, text="Refresh", command=self.load_stats).pack(pady=5)
+        tab.bind("<Map>", lambda e: self.load_stats())
+
+    def load_stats(self):
+        s = self.analytics.summary(self.student_id)
+        median = f"{s['median_minutes']:.0f} min" if s["median_minutes"] is not None else "-"
+        self.stats_label.config(text=(
+            f"Sessions: {s['sessions']}    Completed: {s['completed']} ({s['completion_rate']:.0%})\n"
+            f"Median session: {median}    Total reading time: {s['total_minutes']} min\n"
+            f"Abandoned sessions (unfinished > {self.analytics.ABANDON_AFTER_DAYS} days): {s['abandoned']}"
+        ))
+        draw_histogram(self.hours_canvas, s["hour_histogram"], [h if h % 3 == 0 else "" for h in range(24)])
+
     # Badges tab
     def badges_tab(self, notebook):
         tab = ttk.Frame(notebook)
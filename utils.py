@@ -0,0 +1,109 @@
+"""
+utils.py
+Shared Tkinter Widgets
+----------------------
+Handles:
+- SearchBar: debounced, cancellable search-as-you-type box with autocomplete,
+  backed by Database.search_index and run off the Tk thread
+- draw_histogram: minimal Canvas bar chart used by the analytics tabs
+"""
+
+import tkinter as tk
+from concurrent.futures import Future, ThreadPoolExecutor
+from tkinter import ttk
+from typing import Callable, Optional
+
+
+class SearchBar:
+    """A search Combobox that queries the book index after the user stops typing.
+
+    The index is built and queried on a single worker thread, so the window
+    opens at once and searches typed meanwhile wait for the build. Only the
+    newest query's result is delivered: a newer keystroke cancels queued work
+    and stale results are dropped. Book rows and suggestion titles are fetched
+    on the Tk thread, since sqlite3 connections are bound to the thread that
+    created them.
+    on_results receives a list of Book rows, or None when the box is cleared.
+    """
+
+    POLL_MS = 15
+
+    def __init__(self, parent, db, on_results: Callable, delay_ms: int = 200, limit: int = 200):
+        self.db = db
+        self.on_results = on_results
+        self.delay_ms = delay_ms
+        self.limit = limit
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="book-search")
+        self._index = db.search_index
+        if self._index is None:
+            self._index = db.attach_search_index(build=False)
+            self._executor.submit(db.build_search_index)
+        self._after_id: Optional[str] = None
+        self._future: Optional[Future] = None
+        self._generation = 0
+
+        frame = tk.Frame(parent)
+        frame.pack(fill="x", padx=10, pady=(10, 0))
+        tk.Label(frame, text="Search title / author:").pack(side="left")
+        self.var = tk.StringVar()
+        self.box = ttk.Combobox(frame, textvariable=self.var, width=50)
+        self.box.pack(side="left", padx=5)
+        ttk.Button(frame, text="Clear", command=self.clear).pack(side="left")
+        self.box.bind("<KeyRelease>", self._on_key)
+        self.box.bind("<<ComboboxSelected>>", lambda e: self._start(self.var.get()))
+        self.box.bind("<Destroy>", lambda e: self._executor.shutdown(wait=False, cancel_futures=True))
+
+    def clear(self):
+        self.var.set("")
+        self._start("")
+
+    def _on_key(self, event):
+        if event.keysym in ("Up", "Down", "Left", "Right", "Return", "Escape"):
+            return
+        if self._after_id is not None:
+            self.box.after_cancel(self._after_id)
+        self._after_id = self.box.after(self.delay_ms, self._start, self.var.get())
+
+    def _start(self, query: str):
+        self._after_id = None
+        self._generation += 1
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
+        if not query.strip():
+            self.box["values"] = ()
+            self.on_results(None)
+            return
+        self._future = self._executor.submit(self._index.lookup, query, self.limit)
+        self.box.after(self.POLL_MS, self._poll, self._generation, self._future)
+
+    def _poll(self, generation: int, future: Future):
+        if generation != self._generation or future.cancelled():
+            return  # superseded by a newer query
+        if not future.done():
+            self.box.after(self.POLL_MS, self._poll, generation, future)
+            return
+        result = future.result()
+        wanted = set(result["book_ids"])
+        rows = self.db.get_books_by_ids(list(dict.fromkeys(result["book_ids"] + result["suggestion_ids"])))
+        titles = {r["BookID"]: r["Title"] for r in rows}
+        self.box["values"] = list(dict.fromkeys(titles[b] for b in result["suggestion_ids"] if b in titles))
+        self.on_results([r for r in rows if r["BookID"] in wanted])
+
+
+def draw_histogram(canvas: tk.Canvas, counts, labels=None, color: str = "#4a90d9"):
+    """Draw a simple bar chart of counts on canvas, with optional bar labels."""
+    canvas.delete("all")
+    # winfo_* report 1 until the canvas has been laid out
+    width = canvas.winfo_width() if canvas.winfo_width() > 1 else int(canvas["width"])
+    height = canvas.winfo_height() if canvas.winfo_height() > 1 else int(canvas["height"])
+    if not counts:
+        return
+    peak = max(counts) or 1
+    bar_w = width / len(counts)
+    for i, value in enumerate(counts):
+        x0 = i * bar_w + 2
+        bar_h = (height - 20) * value / peak
+        canvas.create_rectangle(x0, height - 15 - bar_h, x0 + bar_w - 4, height - 15, fill=color, outline="")
+        if labels and i < len(labels) and labels[i] != "":
+            canvas.create_text(x0 + bar_w / 2 - 2, height - 7, text=str(labels[i]), font=("Segoe UI", 7))